@@ -103,9 +103,7 @@ async def list_accounts(_: AdminAuthDep):
             AccountResponse(
                 organization_uuid=org_uuid,
                 capabilities=account.capabilities,
-                cookie_value=account.cookie_value[:20] + "..."
-                if account.cookie_value
-                else None,
+                cookie_value=account.cookie_short,
                 status=account.status,
                 auth_type=account.auth_type,
                 is_pro=account.is_pro,
@@ -164,9 +162,7 @@ async def get_account(organization_uuid: str, _: AdminAuthDep):
     return AccountResponse(
         organization_uuid=organization_uuid,
         capabilities=account.capabilities,
-        cookie_value=account.cookie_value[:20] + "..."
-        if account.cookie_value
-        else None,
+        cookie_value=account.cookie_short,
         status=account.status,
         auth_type=account.auth_type,
         is_pro=account.is_pro,
@@ -205,9 +201,7 @@ async def create_account(account_data: AccountCreate, _: AdminAuthDep):
     return AccountResponse(
         organization_uuid=account.organization_uuid,
         capabilities=account.capabilities,
-        cookie_value=account.cookie_value[:20] + "..."
-        if account.cookie_value
-        else None,
+        cookie_value=account.cookie_short,
         status=account.status,
         auth_type=account.auth_type,
         is_pro=account.is_pro,
@@ -263,14 +257,12 @@ async def update_account(
             account.resets_at = None
 
     # Save changes
-    account_manager.save_accounts()
+    account_manager.request_save()
 
     return AccountResponse(
         organization_uuid=organization_uuid,
         capabilities=account.capabilities,
-        cookie_value=account.cookie_value[:20] + "..."
-        if account.cookie_value
-        else None,
+        cookie_value=account.cookie_short,
         status=account.status,
         auth_type=account.auth_type,
         is_pro=account.is_pro,
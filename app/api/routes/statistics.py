@@ -25,7 +25,7 @@ router = APIRouter()
 @router.get("", response_model=StatisticsResponse)
 async def get_statistics(_: AdminAuthDep):
     """Get system statistics. Requires admin authentication."""
-    stats = await account_manager.get_status()
+    stats = await account_manager.get_status(include_accounts=False)
     return {
         "status": "healthy" if stats["valid_accounts"] > 0 else "degraded",
         "accounts": stats,
@@ -23,7 +23,7 @@ class AuthType(str, Enum):
     BOTH = "both"
 
 
-@dataclass
+@dataclass(slots=True)
 class OAuthToken:
     """Encapsulates OAuth credentials for an account."""
 
@@ -52,6 +52,23 @@ class OAuthToken:
 class Account:
     """Represents a Claude.ai account with cookie and/or OAuth authentication."""
 
+    # 账户数量可能很多且每次落盘都要逐个序列化，固定属性布局以节省内存与属性访问开销
+    __slots__ = (
+        "organization_uuid",
+        "short_id",
+        "_capabilities",
+        "_is_pro",
+        "_is_max",
+        "_cookie_value",
+        "cookie_short",
+        "_status",
+        "_auth_type",
+        "_last_used",
+        "last_used_ts",
+        "_resets_at",
+        "_oauth_token",
+    )
+
     def __init__(
         self,
         organization_uuid: str,
@@ -61,13 +78,16 @@ class Account:
         auth_type: AuthType = AuthType.COOKIE_ONLY,
     ):
         self.organization_uuid = organization_uuid
-        self.capabilities = capabilities
+        # 日志与状态展示用的缩写，构造时算好，避免每次输出都切片拼接
+        self.short_id = organization_uuid[:8] + "..."
+        self._capabilities = capabilities
+        self._is_pro, self._is_max = self._compute_tiers(capabilities)
         self.cookie_value = cookie_value
-        self.status = AccountStatus.VALID
-        self.auth_type = auth_type
+        self._status = AccountStatus.VALID
+        self._auth_type = auth_type
         self.last_used = datetime.now()
-        self.resets_at: Optional[datetime] = None
-        self.oauth_token: Optional[OAuthToken] = oauth_token
+        self._resets_at: Optional[datetime] = None
+        self._oauth_token: Optional[OAuthToken] = oauth_token
 
     def __enter__(self) -> "Account":
         """Enter the context manager."""
@@ -109,19 +129,95 @@ class Account:
     def save(self) -> None:
         from app.services.account import account_manager
 
-        account_manager.save_accounts()
+        account_manager.request_save()
+
+    def _notify_changed(self) -> None:
+        """Let the account manager re-index this account for selection."""
+        from app.services.account import account_manager
+
+        account_manager._reindex_account(self)
+
+    # status / auth_type / capabilities / oauth_token / resets_at 决定账户能否被选中、
+    # 何时刷新 Token 及何时解除限流，修改时同步更新管理器的索引
+    @property
+    def status(self) -> AccountStatus:
+        return self._status
+
+    @status.setter
+    def status(self, value: AccountStatus) -> None:
+        self._status = value
+        self._notify_changed()
+
+    @property
+    def auth_type(self) -> AuthType:
+        return self._auth_type
+
+    @auth_type.setter
+    def auth_type(self, value: AuthType) -> None:
+        self._auth_type = value
+        self._notify_changed()
+
+    @property
+    def resets_at(self) -> Optional[datetime]:
+        return self._resets_at
+
+    @resets_at.setter
+    def resets_at(self, value: Optional[datetime]) -> None:
+        self._resets_at = value
+        self._notify_changed()
+
+    @property
+    def oauth_token(self) -> Optional[OAuthToken]:
+        return self._oauth_token
+
+    @oauth_token.setter
+    def oauth_token(self, value: Optional[OAuthToken]) -> None:
+        self._oauth_token = value
+        self._notify_changed()
+
+    # 选择账户时按浮点时间戳比较，避免逐个比较 datetime
+    @property
+    def last_used(self) -> datetime:
+        return self._last_used
+
+    @last_used.setter
+    def last_used(self, value: datetime) -> None:
+        self._last_used = value
+        self.last_used_ts = value.timestamp()
+
+    @property
+    def cookie_value(self) -> Optional[str]:
+        return self._cookie_value
+
+    @cookie_value.setter
+    def cookie_value(self, value: Optional[str]) -> None:
+        self._cookie_value = value
+        self.cookie_short: Optional[str] = value[:20] + "..." if value else None
+
+    @property
+    def capabilities(self) -> Optional[List[str]]:
+        return self._capabilities
+
+    @capabilities.setter
+    def capabilities(self, value: Optional[List[str]]) -> None:
+        self._capabilities = value
+        self._is_pro, self._is_max = self._compute_tiers(value)
+        self._notify_changed()
 
     def to_dict(self) -> dict:
         """Convert Account to dictionary for JSON serialization."""
+        # 直接读取底层属性，跳过 property 调用
+        resets_at = self._resets_at
+        oauth_token = self._oauth_token
         return {
             "organization_uuid": self.organization_uuid,
-            "capabilities": self.capabilities,
-            "cookie_value": self.cookie_value,
-            "status": self.status.value,
-            "auth_type": self.auth_type.value,
-            "last_used": self.last_used.isoformat(),
-            "resets_at": self.resets_at.isoformat() if self.resets_at else None,
-            "oauth_token": self.oauth_token.to_dict() if self.oauth_token else None,
+            "capabilities": self._capabilities,
+            "cookie_value": self._cookie_value,
+            "status": self._status.value,
+            "auth_type": self._auth_type.value,
+            "last_used": self._last_used.isoformat(),
+            "resets_at": resets_at.isoformat() if resets_at else None,
+            "oauth_token": oauth_token.to_dict() if oauth_token else None,
         }
 
     @classmethod
@@ -144,27 +240,29 @@ class Account:
 
         return account
 
-    @property
-    def is_pro(self) -> bool:
-        """Check if account has pro capabilities."""
-        if not self.capabilities:
-            return False
+    @staticmethod
+    def _compute_tiers(capabilities: Optional[List[str]]) -> tuple[bool, bool]:
+        """Derive (is_pro, is_max) from capabilities."""
+        if not capabilities:
+            return False, False
 
         pro_keywords = ["pro", "enterprise", "raven", "max"]
-        return any(
-            keyword in cap.lower()
-            for cap in self.capabilities
-            for keyword in pro_keywords
+        is_pro = any(
+            keyword in cap.lower() for cap in capabilities for keyword in pro_keywords
         )
+        is_max = any("max" in cap.lower() for cap in capabilities)
+        return is_pro, is_max
+
+    @property
+    def is_pro(self) -> bool:
+        """Check if account has pro capabilities."""
+        return self._is_pro
 
     @property
     def is_max(self) -> bool:
         """Check if account has max capabilities."""
-        if not self.capabilities:
-            return False
-
-        return any("max" in cap.lower() for cap in self.capabilities)
+        return self._is_max
 
     def __repr__(self) -> str:
         """String representation of the Account."""
-        return f"<Account organization_uuid={self.organization_uuid[:8]}... status={self.status.value} auth_type={self.auth_type.value}>"
+        return f"<Account organization_uuid={self.short_id} status={self.status.value} auth_type={self.auth_type.value}>"
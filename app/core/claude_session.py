@@ -1,4 +1,5 @@
-from typing import Dict, Any, AsyncIterator, Optional
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Any, AsyncIterator, Optional
 from datetime import datetime
 from app.core.http_client import Response
 from loguru import logger
@@ -7,6 +8,9 @@ from app.core.config import settings
 from app.core.external.claude_client import ClaudeWebClient
 from app.services.account import account_manager
 
+# 每个会话最多记住的已上传图片数（按最近使用淘汰）
+_UPLOADED_FILE_CACHE_SIZE = 128
+
 
 class ClaudeWebSession:
     def __init__(self, session_id: str):
@@ -16,6 +20,9 @@ class ClaudeWebSession:
         self.paprika_mode: Optional[str] = None
         self.web_search_enabled: Optional[bool] = None  # 网络搜索开关状态
         self.sse_stream: Optional[AsyncIterator[str]] = None
+        self._response: Optional[Response] = None
+        # 图片内容哈希 -> 当前对话中已上传的 file_id
+        self._uploaded_files: OrderedDict[bytes, str] = OrderedDict()
 
     async def initialize(self):
         """Initialize the session."""
@@ -52,20 +59,43 @@ class ClaudeWebSession:
             await self.client.delete_conversation(self.conv_uuid)
 
         await account_manager.release_session(self.session_id)
+
+        # 未读完的流（如暂停等待工具结果的 SSE 流、超时会话）需显式关闭，
+        # 否则底层连接要等 GC 才释放，也无法安全地归还 HTTP 会话
+        await self._close_stream()
         await self.client.cleanup()
 
+    async def _close_stream(self) -> None:
+        """Close the SSE generator and abort its response if still open."""
+        sse_stream, self.sse_stream = self.sse_stream, None
+        response, self._response = self._response, None
+
+        if sse_stream is not None and not sse_stream.ag_running:
+            try:
+                await sse_stream.aclose()
+            except Exception as e:
+                logger.debug(f"Failed to close SSE stream: {e}")
+
+        if response is not None:
+            try:
+                await response.aclose()
+            except Exception as e:
+                logger.debug(f"Failed to close response: {e}")
+
     async def _ensure_conversation_initialized(self) -> None:
         """Ensure conversation is initialized. Create if not exists."""
-        if not self.conv_uuid:
-            conv_uuid, paprika_mode = await self.client.create_conversation()
-            self.conv_uuid = conv_uuid
-            self.paprika_mode = paprika_mode
+        if self.conv_uuid:
+            return
+
+        conv_uuid, paprika_mode = await self.client.create_conversation()
+        self.conv_uuid = conv_uuid
+        self.paprika_mode = paprika_mode
 
     def update_activity(self):
         """Update last activity timestamp."""
         self.last_activity = datetime.now()
 
-    async def send_message(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+    async def send_message(self, payload: Dict[str, Any] | str) -> AsyncIterator[str]:
         """Process a completion request through the pipeline."""
         self.update_activity()
 
@@ -75,13 +105,14 @@ class ClaudeWebSession:
             payload,
             conv_uuid=self.conv_uuid,
         )
+        self._response = response
         self.sse_stream = self.stream(response)
 
         logger.debug(f"Sent message for session {self.session_id}")
         return self.sse_stream
 
     async def upload_file(
-        self, file_data: bytes, filename: str, content_type: str
+        self, file_data: bytes | BinaryIO, filename: str, content_type: str
     ) -> str:
         """Upload a file to the active conversation and return file UUID."""
         if not self.conv_uuid:
@@ -96,6 +127,20 @@ class ClaudeWebSession:
             self.conv_uuid,
         )
 
+    def get_uploaded_file(self, digest: bytes) -> Optional[str]:
+        """Return the file UUID of a previously uploaded file with this digest."""
+        file_id = self._uploaded_files.get(digest)
+        if file_id is not None:
+            self._uploaded_files.move_to_end(digest)
+        return file_id
+
+    def remember_uploaded_file(self, digest: bytes, file_id: str) -> None:
+        """Remember an uploaded file so identical content can reuse its UUID."""
+        self._uploaded_files[digest] = file_id
+        self._uploaded_files.move_to_end(digest)
+        while len(self._uploaded_files) > _UPLOADED_FILE_CACHE_SIZE:
+            self._uploaded_files.popitem(last=False)
+
     async def send_tool_result(self, payload: Dict[str, Any]) -> None:
         """Send tool result to Claude.ai."""
         if not self.conv_uuid:
@@ -178,6 +178,11 @@ class Settings(BaseSettings):
     request_timeout: int = Field(default=60, env="REQUEST_TIMEOUT")
     request_retries: int = Field(default=3, env="REQUEST_RETRIES")
     request_retry_interval: int = Field(default=1, env="REQUEST_RETRY_INTERVAL")
+    max_concurrent_uploads: int = Field(
+        default=5,
+        env="MAX_CONCURRENT_UPLOADS",
+        description="Maximum number of concurrent image uploads to Claude.ai",
+    )
 
     # Feature flags
     preserve_chats: bool = Field(default=False, env="PRESERVE_CHATS")
@@ -229,6 +234,16 @@ class Settings(BaseSettings):
         env="ACCOUNT_TASK_INTERVAL",
         description="Interval for account management task in seconds",
     )
+    cookie_revalidation_ttl: int = Field(
+        default=60,
+        env="COOKIE_REVALIDATION_TTL",
+        description="Seconds a successful cookie validation is reused by account refresh (0 to disable)",
+    )
+    oauth_refresh_concurrency: int = Field(
+        default=5,
+        env="OAUTH_REFRESH_CONCURRENCY",
+        description="Maximum number of OAuth token refreshes run concurrently by the account task",
+    )
 
     # Tool call settings
     tool_call_timeout: int = Field(
@@ -254,6 +269,23 @@ class Settings(BaseSettings):
         description="Interval for cleaning up expired cache checkpoints in seconds",
     )
 
+    # Response cache settings
+    response_cache_enabled: bool = Field(
+        default=False,
+        env="RESPONSE_CACHE_ENABLED",
+        description="Replay cached Claude.ai web responses for identical requests",
+    )
+    response_cache_ttl: int = Field(
+        default=300,
+        env="RESPONSE_CACHE_TTL",
+        description="Time to live for cached responses in seconds",
+    )
+    response_cache_max_size: int = Field(
+        default=512,
+        env="RESPONSE_CACHE_MAX_SIZE",
+        description="Maximum number of cached responses",
+    )
+
     # Claude OAuth settings
     oauth_client_id: str = Field(
         default="9d1c250a-e61b-44d9-88ed-5944d1962f5e",
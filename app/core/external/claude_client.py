@@ -1,7 +1,8 @@
+import asyncio
 import json
 from loguru import logger
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from typing import BinaryIO, List, Optional, Dict, Any, Set, Tuple
 from urllib.parse import urljoin
 from uuid import uuid4
 
@@ -26,14 +27,26 @@ from app.core.account import Account
 from app.services.proxy import proxy_service
 
 
+# 每个 (账号, 代理) 最多保留的空闲 HTTP 会话数
+_MAX_IDLE_SESSIONS_PER_KEY = 2
+
+
 class ClaudeWebClient:
     """Client for interacting with Claude.ai."""
 
+    # 按 (账号, 代理) 缓存空闲 HTTP 会话：客户端独占借出、清理时归还，
+    # 同一账号的后续对话可沿用已建立的 keep-alive 连接，省去重复的 TLS 握手
+    _idle_sessions: Dict[Tuple[str, Optional[str]], List[AsyncSession]] = {}
+    # 后台关闭会话的任务：保留引用，避免任务在完成前被 GC 回收
+    _close_tasks: Set[asyncio.Task] = set()
+
     def __init__(self, account: Account):
         self.account = account
         self.session: Optional[AsyncSession] = None
         self.endpoint = settings.claude_ai_url.encoded_string().rstrip("/")
         self._proxy_url: Optional[str] = None  # 保存代理 URL 用于健康检查
+        # 连接失败后弃用的会话：其上可能仍有未读完的流，清理时再关闭
+        self._discarded_sessions: List[AsyncSession] = []
 
     async def initialize(self):
         """Initialize the client session."""
@@ -42,17 +55,96 @@ class ClaudeWebClient:
             account_id=self.account.organization_uuid
         )
 
-        self.session = create_session(
-            timeout=settings.request_timeout,
-            impersonate="chrome",
-            proxy=self._proxy_url,
-            follow_redirects=False,
+        idle = self._idle_sessions.get(
+            (self.account.organization_uuid, self._proxy_url)
         )
+        if idle:
+            self.session = idle.pop()
+        else:
+            self.session = create_session(
+                timeout=settings.request_timeout,
+                impersonate="chrome",
+                proxy=self._proxy_url,
+                follow_redirects=False,
+            )
 
     async def cleanup(self):
         """Clean up resources."""
-        if self.session:
-            await self.session.close()
+        session, self.session = self.session, None
+        discarded, self._discarded_sessions = self._discarded_sessions, []
+        for old_session in discarded:
+            await self._close_session(old_session)
+
+        if session is None:
+            return
+
+        if not self._release_session(session):
+            await self._close_session(session)
+
+    def _release_session(self, session: AsyncSession) -> bool:
+        """Return the session to the idle pool; False if it should be closed instead."""
+        from app.services.account import account_manager
+
+        organization_uuid = self.account.organization_uuid
+        # 账号已移除（或已被同 UUID 的新对象替换）时不再缓存其会话
+        if not account_manager.is_current(self.account):
+            return False
+
+        # 代理已轮换：关闭该账号在旧代理上的空闲会话
+        key = (organization_uuid, self._proxy_url)
+        for stale_key in [
+            k for k in self._idle_sessions if k[0] == organization_uuid and k != key
+        ]:
+            for stale_session in self._idle_sessions.pop(stale_key):
+                self._schedule_close(stale_session)
+
+        idle = self._idle_sessions.setdefault(key, [])
+        if len(idle) >= _MAX_IDLE_SESSIONS_PER_KEY:
+            return False
+
+        # 服务端下发的 Cookie 只属于上一个对话，归还前清空；账号 Cookie 每次请求显式携带
+        session.clear_cookies()
+        idle.append(session)
+        return True
+
+    def _discard_session(self) -> None:
+        """Stop using the current HTTP session after a connection failure."""
+        if self.session is not None:
+            self._discarded_sessions.append(self.session)
+            self.session = None
+
+    @staticmethod
+    async def _close_session(session: AsyncSession) -> None:
+        try:
+            await session.close()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP session: {e}")
+
+    @classmethod
+    def _schedule_close(cls, session: AsyncSession) -> None:
+        """Close a session in the background from synchronous code."""
+        task = asyncio.create_task(cls._close_session(session))
+        cls._close_tasks.add(task)
+        task.add_done_callback(cls._close_tasks.discard)
+
+    @classmethod
+    def evict_account_sessions(cls, organization_uuid: str) -> None:
+        """Close the idle HTTP sessions kept for a removed account."""
+        for key in [k for k in cls._idle_sessions if k[0] == organization_uuid]:
+            for session in cls._idle_sessions.pop(key):
+                cls._schedule_close(session)
+
+    @classmethod
+    async def close_shared_sessions(cls) -> None:
+        """Close all idle pooled HTTP sessions."""
+        sessions = [session for idle in cls._idle_sessions.values() for session in idle]
+        cls._idle_sessions.clear()
+
+        for session in sessions:
+            await cls._close_session(session)
+
+        if cls._close_tasks:
+            await asyncio.gather(*cls._close_tasks)
 
     def _build_headers(
         self, cookie: str, conv_uuid: Optional[str] = None
@@ -97,6 +189,7 @@ class ClaudeWebClient:
             except ProxyNetworkException as e:
                 # Connection error after HTTP retries exhausted
                 # Mark proxy as unhealthy and wrap as retryable AppError
+                self._discard_session()
                 if self._proxy_url:
                     await proxy_service.mark_unhealthy(
                         self._proxy_url, reason=f"connection error: {type(e).__name__}"
@@ -206,7 +299,7 @@ class ClaudeWebClient:
 
     async def upload_file_to_conversation(
         self,
-        file_data: bytes,
+        file_data: bytes | BinaryIO,
         filename: str,
         content_type: str,
         conv_uuid: str,
@@ -231,7 +324,7 @@ class ClaudeWebClient:
         return data.resolved_file_uuid
 
     async def _upload_file_legacy(
-        self, file_data: bytes, filename: str, content_type: str
+        self, file_data: bytes | BinaryIO, filename: str, content_type: str
     ) -> str:
         """Upload a file through the legacy organization endpoint."""
         url = urljoin(self.endpoint, f"/api/{self.account.organization_uuid}/upload")
@@ -247,8 +340,13 @@ class ClaudeWebClient:
         data = UploadResponse.model_validate(await response.json())
         return data.resolved_file_uuid
 
-    async def send_message(self, payload: Dict[str, Any], conv_uuid: str) -> Response:
-        """Send a message and return the response."""
+    async def send_message(
+        self, payload: Dict[str, Any] | str, conv_uuid: str
+    ) -> Response:
+        """Send a message and return the response.
+
+        The payload may be a dict or a pre-serialized JSON string.
+        """
         url = urljoin(
             self.endpoint,
             f"/api/organizations/{self.account.organization_uuid}/chat_conversations/{conv_uuid}/completion",
@@ -258,8 +356,20 @@ class ClaudeWebClient:
             "Accept": "text/event-stream",
         }
 
+        if isinstance(payload, str):
+            # 已序列化的 JSON 直接作为请求体发送，跳过再次序列化
+            headers["Content-Type"] = "application/json"
+            body_kwargs = {"data": payload}
+        else:
+            body_kwargs = {"json": payload}
+
         response = await self._request(
-            "POST", url, conv_uuid=conv_uuid, json=payload, headers=headers, stream=True
+            "POST",
+            url,
+            conv_uuid=conv_uuid,
+            headers=headers,
+            stream=True,
+            **body_kwargs,
         )
 
         return response
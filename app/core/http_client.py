@@ -49,6 +49,30 @@ if not RNET_AVAILABLE and not CURL_CFFI_AVAILABLE and not HTTPX_AVAILABLE:
     )
 
 
+# 只有 httpx 能直接流式发送文件对象；rnet / curl_cffi 的 multipart 只接受 bytes，
+# 上传方应直接准备 bytes，避免先写临时文件再整体读回
+STREAMS_FILE_UPLOADS = not RNET_AVAILABLE and not CURL_CFFI_AVAILABLE
+
+
+def _rewind_files(files: Any) -> None:
+    """Seek file-like upload data back to the start before (re)sending."""
+    if not isinstance(files, dict):
+        return
+    for file_info in files.values():
+        file_data = file_info[1] if isinstance(file_info, tuple) else file_info
+        if hasattr(file_data, "seek"):
+            file_data.seek(0)
+
+
+def _read_file_data(file_data: Any) -> Any:
+    """Materialize file-like upload data for clients that only accept raw bytes."""
+    if hasattr(file_data, "read"):
+        # 重试时会再次读取，需要回到文件开头
+        file_data.seek(0)
+        return file_data.read()
+    return file_data
+
+
 class Response(ABC):
     """Abstract response class."""
 
@@ -74,6 +98,10 @@ class Response(ABC):
         """Iterate over response bytes."""
         pass
 
+    async def aclose(self) -> None:
+        """Release the response, aborting an unconsumed streamed body."""
+        pass
+
 
 class CurlResponseWrapper(Response):
     """curl_cffi response wrapper."""
@@ -106,6 +134,9 @@ class CurlResponseWrapper(Response):
             yield chunk
         await self._response.aclose()
 
+    async def aclose(self) -> None:
+        await self._response.aclose()
+
 
 class HttpxResponse(Response):
     """httpx response wrapper."""
@@ -132,6 +163,9 @@ class HttpxResponse(Response):
             yield chunk
         await self._response.aclose()
 
+    async def aclose(self) -> None:
+        await self._response.aclose()
+
 
 if RNET_AVAILABLE:
 
@@ -165,6 +199,9 @@ if RNET_AVAILABLE:
                     yield chunk
             await self._response.close()
 
+        async def aclose(self) -> None:
+            await self._response.close()
+
 
 class AsyncSession(ABC):
     """Abstract async session class."""
@@ -188,6 +225,10 @@ class AsyncSession(ABC):
         """Close the session."""
         pass
 
+    def clear_cookies(self) -> None:
+        """Forget cookies the server set on this session."""
+        pass
+
     async def __aenter__(self):
         return self
 
@@ -237,7 +278,7 @@ if CURL_CFFI_AVAILABLE:
                             name=field_name,
                             content_type=content_type,
                             filename=filename,
-                            data=file_data,
+                            data=_read_file_data(file_data),
                         )
                     else:
                         # Simple format: {"field": data}
@@ -291,6 +332,9 @@ if CURL_CFFI_AVAILABLE:
                 if multipart:
                     multipart.close()
 
+        def clear_cookies(self) -> None:
+            self._session.cookies.clear()
+
         async def close(self):
             await self._session.close()
 
@@ -388,7 +432,7 @@ if RNET_AVAILABLE:
                         parts.append(
                             rnet.Part(
                                 name=field_name,
-                                value=file_data,
+                                value=_read_file_data(file_data),
                                 filename=filename,
                                 mime=content_type,
                             )
@@ -502,6 +546,8 @@ if HTTPX_AVAILABLE:
             **kwargs,
         ) -> Response:
             logger.debug(f"Making {method} request to {url}")
+            # 重试时文件对象已被读到末尾，需要回到开头
+            _rewind_files(kwargs.get("files"))
             if stream:
                 response = await self.stream(
                     method=method,
@@ -523,6 +569,9 @@ if HTTPX_AVAILABLE:
 
             return HttpxResponse(response)
 
+        def clear_cookies(self) -> None:
+            self._client.cookies.clear()
+
         async def close(self):
             await self._client.aclose()
 
@@ -122,7 +122,7 @@ app.include_router(api_router)
 @app.get("/health")
 async def health():
     """Health check endpoint."""
-    stats = await account_manager.get_status()
+    stats = await account_manager.get_status(include_accounts=False)
     return {"status": "healthy" if stats["valid_accounts"] > 0 else "degraded"}
 
 
@@ -1,3 +1,4 @@
+import re
 from typing import Optional, List, Union, Literal, Dict, Any
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from enum import Enum
@@ -154,9 +155,28 @@ class ToolChoice(BaseModel):
 
 
 # 工具定义（支持用户自定义工具和 Server Tool 如 web_search）
+# 已知的 Web Search Server Tool 类型；未收录的新版本日期由正则兜底匹配
+WEB_SEARCH_TOOL_TYPES = frozenset(
+    {"web_search_v0", "web_search_20250305", "web_search_20260209"}
+)
+_match_web_search_tool_type = re.compile(r"web_search_(?:v\d+|\d{8})").fullmatch
+
+
+def is_web_search_tool_type(tool_type: Optional[str]) -> bool:
+    """Check whether a tool type denotes a web search server tool."""
+    if not tool_type:
+        return False
+    return (
+        tool_type in WEB_SEARCH_TOOL_TYPES
+        or _match_web_search_tool_type(tool_type) is not None
+    )
+
+
 class Tool(BaseModel):
     model_config = ConfigDict(extra="allow")
     name: str
+    # Server Tool 类型（如 web_search_20250305），自定义工具通常不带
+    type: Optional[str] = None
     input_schema: Optional[Any] = None  # Server Tool（如 web_search）无此字段，改为可选
     description: Optional[str] = None
 
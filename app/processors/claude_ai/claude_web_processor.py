@@ -1,44 +1,98 @@
+import asyncio
+import binascii
+import hashlib
+import itertools
+import os
+import tempfile
 import time
 import base64
 import random
 import string
-from typing import List
+from typing import BinaryIO, Dict, List, Optional
 from loguru import logger
 
 from app.processors.base import BaseProcessor
 from app.processors.claude_ai import ClaudeAIContext
+from app.core.claude_session import ClaudeWebSession
 from app.services.session import session_manager
+from app.services.response_cache import response_cache_service
 from app.models.internal import ClaudeWebRequest, Attachment
-from app.models.claude import Tool
+from app.models.claude import Base64ImageSource, Tool, is_web_search_tool_type
 from app.core.exceptions import NoValidMessagesError, TooManyFilesError
 from app.core.config import settings
+from app.core.http_client import STREAMS_FILE_UPLOADS
 from app.utils.messages import process_messages
 
 # Claude.ai Web 端的搜索 Tool（与官方 API 的 web_search_20250305 不同）
 WEB_SEARCH_V0_TOOL = {"type": "web_search_v0", "name": "web_search"}
-# 识别客户端发送的 Web Search Server Tool 类型前缀（web_search_20250305, web_search_20260209 等）
-WEB_SEARCH_TOOL_PREFIX = "web_search_"
+
+# 默认 padding 字母表，以及把 base64 中非字母数字字符映射回该字母表的转换表
+_DEFAULT_PAD_TOKENS = string.ascii_letters + string.digits
+_PAD_TRANSLATE_TABLE = bytes.maketrans(b"+/=", _DEFAULT_PAD_TOKENS[:3].encode("ascii"))
+
+# 全局限制图片并发上传数，避免多图请求同时压向 Claude.ai
+_upload_semaphore = asyncio.Semaphore(settings.max_concurrent_uploads or 5)
+
+# 会话 ID：进程唯一前缀 + 递增计数，同一毫秒内的并发请求也不会冲突
+_SESSION_ID_PREFIX = f"session_{os.getpid():x}{int(time.time()):x}"
+_session_counter = itertools.count()
+
+# 分块解码 base64 的块大小（需为 4 的倍数），超过内存阈值的图片溢出到临时文件
+_B64_DECODE_CHUNK_SIZE = 64 * 1024
+_SPOOL_MAX_SIZE = 512 * 1024
+
+
+def _decode_base64_to_file(data: str) -> BinaryIO:
+    """Decode base64 data chunk by chunk into a spooled temporary file.
+
+    Avoids materializing the whole decoded payload (plus an ASCII copy of the
+    input) in memory at once for large images.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_SIZE)
+    try:
+        for start in range(0, len(data), _B64_DECODE_CHUNK_SIZE):
+            spool.write(base64.b64decode(data[start : start + _B64_DECODE_CHUNK_SIZE]))
+    except binascii.Error:
+        # 含换行等非字母表字符时分块会错位，回退为整体解码
+        spool.seek(0)
+        spool.truncate()
+        spool.write(base64.b64decode(data))
+
+    spool.seek(0)
+    return spool
+
+
+def _image_digest(image_source: Base64ImageSource) -> bytes:
+    """Hash an image's media type and base64 payload for upload deduplication."""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(image_source.media_type.encode("ascii"))
+    hasher.update(b"\x00")
+    # 分块编码后哈希，避免为整段 base64 额外复制一份 bytes
+    data = image_source.data
+    for start in range(0, len(data), _B64_DECODE_CHUNK_SIZE):
+        hasher.update(data[start : start + _B64_DECODE_CHUNK_SIZE].encode("ascii"))
+    return hasher.digest()
 
 
 class ClaudeWebProcessor(BaseProcessor):
     """Claude AI processor that handles session management, request building, and sending to Claude AI."""
 
     @staticmethod
-    def _process_web_search_tools(tools: list) -> tuple[bool, list]:
+    def _process_web_search_tools(
+        tools: Optional[List[Tool]],
+    ) -> tuple[bool, List[Tool]]:
         """检测并替换 web search server tool 为 Claude.ai web 格式。
 
         客户端发送的 API 格式（如 web_search_20250305）需要替换为
         Claude.ai web 端格式（web_search_v0）才能在 completion 请求中生效。
         """
+        if not tools:
+            return False, []
+
         has_web_search = False
         filtered_tools = []
         for tool in tools:
-            tool_type = getattr(tool, "type", None)
-            if (
-                tool_type
-                and isinstance(tool_type, str)
-                and tool_type.startswith(WEB_SEARCH_TOOL_PREFIX)
-            ):
+            if is_web_search_tool_type(tool.type):
                 has_web_search = True
             else:
                 filtered_tools.append(tool)
@@ -50,6 +104,91 @@ class ClaudeWebProcessor(BaseProcessor):
 
         return has_web_search, filtered_tools
 
+    @staticmethod
+    def _generate_pad_text(length: int) -> str:
+        """Generate random padding text of the given length."""
+        if settings.pad_tokens:
+            # 自定义 pad_tokens 是词级别的 token，只能逐个随机挑选
+            return "".join(random.choices(settings.pad_tokens, k=length))
+
+        # 默认字母数字表：一次 os.urandom + base64 在 C 层生成，避免逐字符的 Python 循环
+        raw = os.urandom((length * 3) // 4 + 3)
+        return (
+            base64.b64encode(raw)[:length]
+            .translate(_PAD_TRANSLATE_TABLE)
+            .decode("ascii")
+        )
+
+    @staticmethod
+    async def _upload_image(
+        claude_session: ClaudeWebSession, index: int, image_source: Base64ImageSource
+    ) -> str:
+        """Decode a base64 image and upload it to the active conversation."""
+        async with _upload_semaphore:
+            # 同一会话内已上传过的相同图片直接复用 file_id，跳过解码与上传
+            digest = await asyncio.to_thread(_image_digest, image_source)
+            file_id = claude_session.get_uploaded_file(digest)
+            if file_id:
+                logger.debug(f"Reused uploaded image {index}: {file_id}")
+                return file_id
+
+            # 大图解码放到线程中执行，避免阻塞事件循环；
+            # 只有能流式发送文件的后端才走临时文件，其余直接解码为 bytes
+            if STREAMS_FILE_UPLOADS:
+                image_data = await asyncio.to_thread(
+                    _decode_base64_to_file, image_source.data
+                )
+            else:
+                image_data = await asyncio.to_thread(
+                    base64.b64decode, image_source.data
+                )
+
+            try:
+                file_id = await claude_session.upload_file(
+                    file_data=image_data,
+                    filename=f"image_{index}.png",  # Default filename
+                    content_type=image_source.media_type,
+                )
+            finally:
+                if STREAMS_FILE_UPLOADS:
+                    image_data.close()
+
+            claude_session.remember_uploaded_file(digest, file_id)
+            logger.debug(f"Uploaded image {index}: {file_id}")
+            return file_id
+
+    async def _upload_images(
+        self, claude_session: ClaudeWebSession, images: List[Base64ImageSource]
+    ) -> List[str]:
+        """Upload distinct images concurrently, in order of first appearance."""
+        # 历史消息中重复出现的同一张图片（如反复回传的截图）只上传并附加一次；
+        # 记下每张图片在请求中的所有位置，日志仍能对应回客户端消息
+        unique_images: Dict[tuple[str, str], Base64ImageSource] = {}
+        image_indices: Dict[tuple[str, str], List[int]] = {}
+        for index, image_source in enumerate(images):
+            key = (image_source.media_type, image_source.data)
+            unique_images.setdefault(key, image_source)
+            image_indices.setdefault(key, []).append(index)
+
+        indices = list(image_indices.values())
+        results = await asyncio.gather(
+            *(
+                self._upload_image(claude_session, positions[0], image_source)
+                for positions, image_source in zip(indices, unique_images.values())
+            ),
+            return_exceptions=True,
+        )
+
+        for positions, result in zip(indices, results):
+            if isinstance(result, BaseException):
+                # 图片上传采用全有或全无策略，避免继续发送一个缺图的请求。
+                # 否则纯图片消息会触发空 prompt，图文消息也会静默退化成纯文字。
+                positions_text = ", ".join(map(str, positions))
+                logger.error(f"Failed to upload image {positions_text}: {result}")
+                raise result
+
+        return list(results)
+
     async def process(self, context: ClaudeAIContext) -> ClaudeAIContext:
         """
         Claude AI processor that:
@@ -82,6 +221,18 @@ class ClaudeWebProcessor(BaseProcessor):
             if not request.messages:
                 raise NoValidMessagesError()
 
+            # 精确匹配响应缓存：含工具的请求依赖会话续接，不参与缓存
+            if settings.response_cache_enabled and not request.tools:
+                cache_key = response_cache_service.build_key(request)
+                cached_chunks = response_cache_service.get(cache_key)
+                if cached_chunks is not None:
+                    logger.info("Replaying cached Claude.ai response")
+                    context.original_stream = response_cache_service.replay(
+                        cached_chunks
+                    )
+                    return context
+                context.metadata["response_cache_key"] = cache_key
+
             merged_text, images = await process_messages(
                 request.messages, request.system
             )
@@ -93,21 +244,11 @@ class ClaudeWebProcessor(BaseProcessor):
             if len(images) > MAX_WEB_FILES:
                 raise TooManyFilesError(count=len(images), limit=MAX_WEB_FILES)
 
-            if settings.padtxt_length > 0:
-                pad_tokens = settings.pad_tokens or (
-                    string.ascii_letters + string.digits
-                )
-                pad_text = "".join(random.choices(pad_tokens, k=settings.padtxt_length))
-                merged_text = pad_text + merged_text
-                logger.debug(
-                    f"Added {settings.padtxt_length} padding tokens to the beginning of the message"
-                )
-
             # Step 2: Get or create Claude session (only after validation passes)
             if not context.claude_session:
                 session_id = context.metadata.get("session_id")
                 if not session_id:
-                    session_id = f"session_{int(time.time() * 1000)}"
+                    session_id = f"{_SESSION_ID_PREFIX}_{next(_session_counter):x}"
                     context.metadata["session_id"] = session_id
 
                 logger.debug(f"Creating new session: {session_id}")
@@ -115,32 +256,32 @@ class ClaudeWebProcessor(BaseProcessor):
                     session_id
                 )
 
+            # 后续上传文件、设置对话模式都依赖 conv_uuid：填充文本放到线程中生成，
+            # 与创建对话的网络往返真正并行，冷会话不必先等本地计算完成
+            init_coro = context.claude_session._ensure_conversation_initialized()
+            if settings.padtxt_length > 0:
+                pad_text, _ = await asyncio.gather(
+                    asyncio.to_thread(self._generate_pad_text, settings.padtxt_length),
+                    init_coro,
+                )
+                merged_text = pad_text + merged_text
+                logger.debug(
+                    f"Added {settings.padtxt_length} padding tokens to the beginning of the message"
+                )
+            else:
+                await init_coro
+
+            # 检测 Web Search Tool，替换为 Claude.ai web 格式
+            has_web_search, processed_tools = self._process_web_search_tools(
+                request.tools
+            )
+
             # Step 3: Upload files and build request
             image_file_ids: List[str] = []
             if images:
-                # 新上传端点是对话级接口，上传前必须先拿到 conv_uuid。
-                await context.claude_session._ensure_conversation_initialized()
-
-                for i, image_source in enumerate(images):
-                    try:
-                        # Convert base64 to bytes
-                        image_data = base64.b64decode(image_source.data)
-
-                        # Upload to Claude
-                        file_id = await context.claude_session.upload_file(
-                            file_data=image_data,
-                            filename=f"image_{i}.png",  # Default filename
-                            content_type=image_source.media_type,
-                        )
-                        image_file_ids.append(file_id)
-                        logger.debug(f"Uploaded image {i}: {file_id}")
-                    except Exception as e:
-                        # 图片上传采用全有或全无策略，避免继续发送一个缺图的请求。
-                        # 否则纯图片消息会触发空 prompt，图文消息也会静默退化成纯文字。
-                        logger.error(f"Failed to upload image {i}: {e}")
-                        raise
-
-            # 无图片时，后续设置对话模式或发送消息仍会按需初始化会话。
+                image_file_ids = await self._upload_images(
+                    context.claude_session, images
+                )
 
             paprika_mode = (
                 "extended"
@@ -153,11 +294,7 @@ class ClaudeWebProcessor(BaseProcessor):
 
             await context.claude_session.set_paprika_mode(paprika_mode)
 
-            # 检测 Web Search Tool，替换为 Claude.ai web 格式，并设置对话级搜索开关
-            request_tools = request.tools or []
-            has_web_search, processed_tools = self._process_web_search_tools(
-                request_tools
-            )
+            # 设置对话级搜索开关
             if has_web_search:
                 await context.claude_session.set_web_search(True)
 
@@ -180,9 +317,16 @@ class ClaudeWebProcessor(BaseProcessor):
             f"Sending request to Claude.ai for session {context.claude_session.session_id}"
         )
 
-        request_dict = context.claude_web_request.model_dump(exclude_none=True)
+        # 使用 Pydantic 的 Rust JSON 序列化，避免先生成 Python dict 再序列化
+        request_json = context.claude_web_request.model_dump_json(exclude_none=True)
         context.original_stream = await context.claude_session.send_message(
-            request_dict
+            request_json
         )
 
+        cache_key = context.metadata.get("response_cache_key")
+        if cache_key:
+            context.original_stream = response_cache_service.capture(
+                cache_key, context.original_stream
+            )
+
         return context
@@ -4,14 +4,17 @@ from app.processors.base import BaseProcessor
 from app.processors.claude_ai import ClaudeAIContext
 from app.services.event_processing.event_parser import EventParser
 
+# 默认严格遵循 Anthropic 标准事件：未建模事件直接跳过，避免下游客户端类型校验失败。
+# EventParser 的缓冲状态按流隔离，所有请求共享同一个实例。
+_DEFAULT_PARSER = EventParser(skip_unknown_events=True)
+
 
 class EventParsingProcessor(BaseProcessor):
     """Processor that parses SSE streams into StreamingEvent objects."""
 
     def __init__(self):
         super().__init__()
-        # 默认严格遵循 Anthropic 标准事件：未建模事件直接跳过，避免下游客户端类型校验失败
-        self.parser = EventParser(skip_unknown_events=True)
+        self.parser = _DEFAULT_PARSER
 
     async def process(self, context: ClaudeAIContext) -> ClaudeAIContext:
         """
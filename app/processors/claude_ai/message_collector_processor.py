@@ -1,3 +1,4 @@
+from contextlib import aclosing
 import json5
 from typing import AsyncIterator
 from loguru import logger
@@ -70,113 +71,122 @@ class MessageCollectorProcessor(BaseProcessor):
         """
         context.collected_message = None
 
-        async for event in event_stream:
-            # Process the event to build/update the message
-            if isinstance(event.root, MessageStartEvent):
-                context.collected_message = event.root.message.model_copy(deep=True)
-                logger.debug(f"Message started: {context.collected_message.id}")
-
-            elif isinstance(event.root, ContentBlockStartEvent):
-                if context.collected_message:
-                    while len(context.collected_message.content) <= event.root.index:
-                        context.collected_message.content.append(None)
-                    context.collected_message.content[event.root.index] = (
-                        event.root.content_block.model_copy(deep=True)
-                    )
-                    # 非流模式需输出 Anthropic 标准 thinking.signature
-                    block = context.collected_message.content[event.root.index]
-                    if isinstance(block, ThinkingContent) and not block.signature:
-                        block.signature = ""
-                    logger.debug(
-                        f"Content block {event.root.index} started: {event.root.content_block.type}"
-                    )
-
-            elif isinstance(event.root, ContentBlockDeltaEvent):
-                if context.collected_message and event.root.index < len(
-                    context.collected_message.content
-                ):
-                    self._apply_delta(
-                        context.collected_message.content[event.root.index],
-                        event.root.delta,
-                    )
-
-            elif isinstance(event.root, ContentBlockStopEvent):
-                # Boundary checking to prevent IndexError caused by refusal responses
-                if (
-                    context.collected_message
-                    and event.root.index < len(context.collected_message.content)
-                ):
-                    block = context.collected_message.content[event.root.index]
-                    if isinstance(block, (ToolUseContent, ServerToolUseContent)):
-                        if hasattr(block, "input_json") and block.input_json:
-                            block.input = json5.loads(block.input_json)
-                            del block.input_json
-                    if isinstance(block, ToolResultContent):
-                        if hasattr(block, "content_json") and block.content_json:
-                            # web_search 的 tool_result 可能包含 knowledge 等非 text/image 项，直接保留原始结构
-                            try:
-                                block.content = json5.loads(block.content_json)
-                            except Exception as e:
-                                logger.warning(
-                                    f"Failed to parse tool result content_json: {e}"
+        async with aclosing(event_stream):
+            async for event in event_stream:
+                # Process the event to build/update the message
+                if isinstance(event.root, MessageStartEvent):
+                    context.collected_message = event.root.message.model_copy(deep=True)
+                    logger.debug(f"Message started: {context.collected_message.id}")
+
+                elif isinstance(event.root, ContentBlockStartEvent):
+                    if context.collected_message:
+                        while (
+                            len(context.collected_message.content) <= event.root.index
+                        ):
+                            context.collected_message.content.append(None)
+                        context.collected_message.content[event.root.index] = (
+                            event.root.content_block.model_copy(deep=True)
+                        )
+                        # 非流模式需输出 Anthropic 标准 thinking.signature
+                        block = context.collected_message.content[event.root.index]
+                        if isinstance(block, ThinkingContent) and not block.signature:
+                            block.signature = ""
+                        logger.debug(
+                            f"Content block {event.root.index} started: {event.root.content_block.type}"
+                        )
+
+                elif isinstance(event.root, ContentBlockDeltaEvent):
+                    if context.collected_message and event.root.index < len(
+                        context.collected_message.content
+                    ):
+                        self._apply_delta(
+                            context.collected_message.content[event.root.index],
+                            event.root.delta,
+                        )
+
+                elif isinstance(event.root, ContentBlockStopEvent):
+                    # Boundary checking to prevent IndexError caused by refusal responses
+                    if context.collected_message and event.root.index < len(
+                        context.collected_message.content
+                    ):
+                        block = context.collected_message.content[event.root.index]
+                        if isinstance(block, (ToolUseContent, ServerToolUseContent)):
+                            if hasattr(block, "input_json") and block.input_json:
+                                block.input = json5.loads(block.input_json)
+                                del block.input_json
+                        if isinstance(block, ToolResultContent):
+                            if hasattr(block, "content_json") and block.content_json:
+                                # web_search 的 tool_result 可能包含 knowledge 等非 text/image 项，直接保留原始结构
+                                try:
+                                    block.content = json5.loads(block.content_json)
+                                except Exception as e:
+                                    logger.warning(
+                                        f"Failed to parse tool result content_json: {e}"
+                                    )
+                                del block.content_json
+                                context.collected_message.content[event.root.index] = (
+                                    block
                                 )
-                            del block.content_json
-                            context.collected_message.content[event.root.index] = block
-                    logger.debug(f"Content block {event.root.index} stopped")
-                else:
-                    logger.debug(
-                        f"Content block {event.root.index} stop skipped (no corresponding start)"
-                    )
-
-            elif isinstance(event.root, MessageDeltaEvent):
-                if context.collected_message and event.root.delta:
-                    if event.root.delta.stop_reason:
-                        context.collected_message.stop_reason = (
-                            event.root.delta.stop_reason
+                        logger.debug(f"Content block {event.root.index} stopped")
+                    else:
+                        logger.debug(
+                            f"Content block {event.root.index} stop skipped (no corresponding start)"
                         )
-                        # When refusal is detected and content is empty, yield ErrorEvent
-                        if (
-                            event.root.delta.stop_reason == "refusal"
-                            and not context.collected_message.content
-                        ):
-                            logger.warning("Request refused by Claude's safety filter")
-                            error_event = StreamingEvent(
-                                root=ErrorEvent(
-                                    type="error",
-                                    error=ErrorInfo(
-                                        type="refusal",
-                                        message="Chat paused: Claude's safety filters flagged this message. This occasionally happens with normal, safe messages. Try rephrasing or using a different model."
+
+                elif isinstance(event.root, MessageDeltaEvent):
+                    if context.collected_message and event.root.delta:
+                        if event.root.delta.stop_reason:
+                            context.collected_message.stop_reason = (
+                                event.root.delta.stop_reason
+                            )
+                            # When refusal is detected and content is empty, yield ErrorEvent
+                            if (
+                                event.root.delta.stop_reason == "refusal"
+                                and not context.collected_message.content
+                            ):
+                                logger.warning(
+                                    "Request refused by Claude's safety filter"
+                                )
+                                error_event = StreamingEvent(
+                                    root=ErrorEvent(
+                                        type="error",
+                                        error=ErrorInfo(
+                                            type="refusal",
+                                            message="Chat paused: Claude's safety filters flagged this message. This occasionally happens with normal, safe messages. Try rephrasing or using a different model.",
+                                        ),
                                     )
                                 )
+                                yield error_event
+                        if event.root.delta.stop_sequence:
+                            context.collected_message.stop_sequence = (
+                                event.root.delta.stop_sequence
                             )
-                            yield error_event
-                    if event.root.delta.stop_sequence:
-                        context.collected_message.stop_sequence = (
-                            event.root.delta.stop_sequence
+                    if context.collected_message and event.root.usage:
+                        context.collected_message.usage = event.root.usage
+
+                elif isinstance(event.root, MessageStopEvent):
+                    if context.collected_message:
+                        # 兜底补齐 thinking.signature，避免下游 Anthropic 客户端校验失败
+                        for block in context.collected_message.content:
+                            if (
+                                isinstance(block, ThinkingContent)
+                                and not block.signature
+                            ):
+                                block.signature = ""
+                        context.collected_message.content = [
+                            block
+                            for block in context.collected_message.content
+                            if block is not None
+                        ]
+                        logger.debug(
+                            f"Message stopped with {len(context.collected_message.content)} content blocks"
                         )
-                if context.collected_message and event.root.usage:
-                    context.collected_message.usage = event.root.usage
 
-            elif isinstance(event.root, MessageStopEvent):
-                if context.collected_message:
-                    # 兜底补齐 thinking.signature，避免下游 Anthropic 客户端校验失败
-                    for block in context.collected_message.content:
-                        if isinstance(block, ThinkingContent) and not block.signature:
-                            block.signature = ""
-                    context.collected_message.content = [
-                        block
-                        for block in context.collected_message.content
-                        if block is not None
-                    ]
-                    logger.debug(
-                        f"Message stopped with {len(context.collected_message.content)} content blocks"
-                    )
-
-            elif isinstance(event.root, ErrorEvent):
-                logger.warning(f"Error event received: {event.root.error.message}")
-
-            # Yield the event without modification
-            yield event
+                elif isinstance(event.root, ErrorEvent):
+                    logger.warning(f"Error event received: {event.root.error.message}")
+
+                # Yield the event without modification
+                yield event
 
         if context.collected_message:
             # 避免对包含非常规 tool_result 内容（如 knowledge 列表）的消息做深度序列化时产生噪音告警
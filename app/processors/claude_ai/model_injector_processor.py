@@ -1,3 +1,4 @@
+from contextlib import aclosing
 from typing import AsyncIterator
 from loguru import logger
 
@@ -54,15 +55,16 @@ class ModelInjectorProcessor(BaseProcessor):
         # Get model from request
         model = context.messages_api_request.model
 
-        async for event in event_stream:
-            if isinstance(event.root, MessageStartEvent):
-                # Check if model is missing or empty
-                if not event.root.message.model:
-                    event.root.message.model = model
-                    logger.debug(f"Injected model '{model}' into MessageStartEvent")
-                else:
-                    logger.debug(
-                        f"MessageStartEvent already has model: '{event.root.message.model}'"
-                    )
+        async with aclosing(event_stream):
+            async for event in event_stream:
+                if isinstance(event.root, MessageStartEvent):
+                    # Check if model is missing or empty
+                    if not event.root.message.model:
+                        event.root.message.model = model
+                        logger.debug(f"Injected model '{model}' into MessageStartEvent")
+                    else:
+                        logger.debug(
+                            f"MessageStartEvent already has model: '{event.root.message.model}'"
+                        )
 
-            yield event
+                yield event
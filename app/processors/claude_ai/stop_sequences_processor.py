@@ -1,3 +1,4 @@
+from contextlib import aclosing
 from typing import AsyncIterator, List
 from loguru import logger
 
@@ -75,117 +76,119 @@ class StopSequencesProcessor(BaseProcessor):
         # Track potential matches: (start_position, current_matched_text)
         potential_matches = []
 
-        async for event in event_stream:
-            if isinstance(event.root, ContentBlockDeltaEvent) and isinstance(
-                event.root.delta, TextDelta
-            ):
-                text = event.root.delta.text
-                current_index = event.root.index
+        async with aclosing(event_stream):
+            async for event in event_stream:
+                if isinstance(event.root, ContentBlockDeltaEvent) and isinstance(
+                    event.root.delta, TextDelta
+                ):
+                    text = event.root.delta.text
+                    current_index = event.root.index
 
-                for char in text:
-                    buffer += char
-                    current_pos = len(buffer) - 1
+                    for char in text:
+                        buffer += char
+                        current_pos = len(buffer) - 1
 
-                    potential_matches.append((current_pos, ""))
+                        potential_matches.append((current_pos, ""))
 
-                    new_matches = []
-                    for start_pos, matched_text in potential_matches:
-                        extended_match = matched_text + char
+                        new_matches = []
+                        for start_pos, matched_text in potential_matches:
+                            extended_match = matched_text + char
 
-                        could_match = False
-                        for stop_seq in stop_sequences:
-                            if stop_seq.startswith(extended_match):
-                                could_match = True
-                                break
+                            could_match = False
+                            for stop_seq in stop_sequences:
+                                if stop_seq.startswith(extended_match):
+                                    could_match = True
+                                    break
 
-                        if could_match:
-                            new_matches.append((start_pos, extended_match))
+                            if could_match:
+                                new_matches.append((start_pos, extended_match))
 
-                            if extended_match in stop_sequences_set:
-                                logger.debug(
-                                    f"Stop sequence detected: '{extended_match}'"
-                                )
+                                if extended_match in stop_sequences_set:
+                                    logger.debug(
+                                        f"Stop sequence detected: '{extended_match}'"
+                                    )
 
-                                safe_text = buffer[:start_pos]
+                                    safe_text = buffer[:start_pos]
+
+                                    if safe_text:
+                                        yield StreamingEvent(
+                                            root=ContentBlockDeltaEvent(
+                                                type="content_block_delta",
+                                                index=current_index,
+                                                delta=TextDelta(
+                                                    type="text_delta", text=safe_text
+                                                ),
+                                            )
+                                        )
 
-                                if safe_text:
                                     yield StreamingEvent(
-                                        root=ContentBlockDeltaEvent(
-                                            type="content_block_delta",
+                                        root=ContentBlockStopEvent(
+                                            type="content_block_stop",
                                             index=current_index,
-                                            delta=TextDelta(
-                                                type="text_delta", text=safe_text
-                                            ),
                                         )
                                     )
 
-                                yield StreamingEvent(
-                                    root=ContentBlockStopEvent(
-                                        type="content_block_stop", index=current_index
+                                    yield StreamingEvent(
+                                        root=MessageDeltaEvent(
+                                            type="message_delta",
+                                            delta=MessageDeltaData(
+                                                stop_reason="stop_sequence",
+                                                stop_sequence=extended_match,
+                                            ),
+                                            usage=None,
+                                        )
                                     )
-                                )
 
-                                yield StreamingEvent(
-                                    root=MessageDeltaEvent(
-                                        type="message_delta",
-                                        delta=MessageDeltaData(
-                                            stop_reason="stop_sequence",
-                                            stop_sequence=extended_match,
-                                        ),
-                                        usage=None,
+                                    yield StreamingEvent(
+                                        root=MessageStopEvent(type="message_stop")
                                     )
-                                )
-
-                                yield StreamingEvent(
-                                    root=MessageStopEvent(type="message_stop")
-                                )
 
-                                if context.claude_session:
-                                    await session_manager.remove_session(
-                                        context.claude_session.session_id
-                                    )
+                                    if context.claude_session:
+                                        await session_manager.remove_session(
+                                            context.claude_session.session_id
+                                        )
 
-                                return
+                                    return
 
-                    potential_matches = new_matches
+                        potential_matches = new_matches
 
-                    if potential_matches:
-                        earliest_start = min(
-                            start_pos for start_pos, _ in potential_matches
-                        )
-                        safe_length = earliest_start
-                    else:
-                        safe_length = len(buffer)
+                        if potential_matches:
+                            earliest_start = min(
+                                start_pos for start_pos, _ in potential_matches
+                            )
+                            safe_length = earliest_start
+                        else:
+                            safe_length = len(buffer)
+
+                        if safe_length > 0:
+                            safe_text = buffer[:safe_length]
+                            yield StreamingEvent(
+                                root=ContentBlockDeltaEvent(
+                                    type="content_block_delta",
+                                    index=current_index,
+                                    delta=TextDelta(type="text_delta", text=safe_text),
+                                )
+                            )
 
-                    if safe_length > 0:
-                        safe_text = buffer[:safe_length]
+                            buffer = buffer[safe_length:]
+                            new_matches = []
+                            for start_pos, matched_text in potential_matches:
+                                new_start = start_pos - safe_length
+                                if new_start >= 0:
+                                    new_matches.append((new_start, matched_text))
+                            potential_matches = new_matches
+
+                else:
+                    # Non-text event - flush buffer and reset
+                    if buffer:
                         yield StreamingEvent(
                             root=ContentBlockDeltaEvent(
                                 type="content_block_delta",
                                 index=current_index,
-                                delta=TextDelta(type="text_delta", text=safe_text),
+                                delta=TextDelta(type="text_delta", text=buffer),
                             )
                         )
+                        buffer = ""
+                        potential_matches = []
 
-                        buffer = buffer[safe_length:]
-                        new_matches = []
-                        for start_pos, matched_text in potential_matches:
-                            new_start = start_pos - safe_length
-                            if new_start >= 0:
-                                new_matches.append((new_start, matched_text))
-                        potential_matches = new_matches
-
-            else:
-                # Non-text event - flush buffer and reset
-                if buffer:
-                    yield StreamingEvent(
-                        root=ContentBlockDeltaEvent(
-                            type="content_block_delta",
-                            index=current_index,
-                            delta=TextDelta(type="text_delta", text=buffer),
-                        )
-                    )
-                    buffer = ""
-                    potential_matches = []
-
-                yield event
+                    yield event
@@ -1,3 +1,4 @@
+from contextlib import aclosing
 from typing import AsyncIterator
 from loguru import logger
 import tiktoken
@@ -59,41 +60,42 @@ class TokenCounterProcessor(BaseProcessor):
         # Pre-calculate input tokens once
         input_tokens = await self._calculate_input_tokens(context)
 
-        async for event in event_stream:
-            if (
-                isinstance(event.root, MessageStartEvent)
-                and not event.root.message.usage
-            ):
-                usage = Usage(
-                    input_tokens=input_tokens,
-                    output_tokens=1,
-                    cache_creation_input_tokens=0,
-                    cache_read_input_tokens=0,
-                )
-
-                event.root.message.usage = usage
-                context.collected_message.usage = usage
-
-                logger.debug(f"Added token usage estimation: input={input_tokens}")
-
-            if isinstance(event.root, MessageDeltaEvent) and not event.root.usage:
-                output_tokens = await self._calculate_output_tokens(context)
-
-                usage = Usage(
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    cache_creation_input_tokens=0,
-                    cache_read_input_tokens=0,
-                )
-
-                event.root.usage = usage
-                context.collected_message.usage = usage
-
-                logger.debug(
-                    f"Added token usage estimation: input={input_tokens}, output={output_tokens}"
-                )
-
-            yield event
+        async with aclosing(event_stream):
+            async for event in event_stream:
+                if (
+                    isinstance(event.root, MessageStartEvent)
+                    and not event.root.message.usage
+                ):
+                    usage = Usage(
+                        input_tokens=input_tokens,
+                        output_tokens=1,
+                        cache_creation_input_tokens=0,
+                        cache_read_input_tokens=0,
+                    )
+
+                    event.root.message.usage = usage
+                    context.collected_message.usage = usage
+
+                    logger.debug(f"Added token usage estimation: input={input_tokens}")
+
+                if isinstance(event.root, MessageDeltaEvent) and not event.root.usage:
+                    output_tokens = await self._calculate_output_tokens(context)
+
+                    usage = Usage(
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        cache_creation_input_tokens=0,
+                        cache_read_input_tokens=0,
+                    )
+
+                    event.root.usage = usage
+                    context.collected_message.usage = usage
+
+                    logger.debug(
+                        f"Added token usage estimation: input={input_tokens}, output={output_tokens}"
+                    )
+
+                yield event
 
     async def _calculate_input_tokens(self, context: ClaudeAIContext) -> int:
         """Calculate input tokens from the request messages."""
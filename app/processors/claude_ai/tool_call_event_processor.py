@@ -1,3 +1,5 @@
+from contextlib import aclosing
+from dataclasses import dataclass
 from typing import AsyncIterator, Optional
 from loguru import logger
 
@@ -11,40 +13,57 @@ from app.models.streaming import (
     MessageStopEvent,
     MessageDeltaData,
 )
-from app.models.claude import ToolResultContent, ToolUseContent
+from app.models.claude import (
+    ToolResultContent,
+    ToolUseContent,
+    is_web_search_tool_type,
+)
 from app.services.tool_call import tool_call_manager
 
 
+# _process_tool_events 中每个事件的处理结果
+_YIELD, _SKIP, _END_TOOL_USE = range(3)
+
+
+@dataclass(slots=True)
+class _ToolState:
+    """Tool tracking state for a single event stream."""
+
+    tool_use_id: Optional[str] = None
+    tool_name: Optional[str] = None
+    is_server_web_search: bool = False
+    content_block_index: Optional[int] = None
+    tool_result_block_index: Optional[int] = None
+    server_web_search_names: frozenset[str] = frozenset()
+
+    def reset_tool_use(self) -> None:
+        """Forget the current tool use block."""
+        self.tool_use_id = None
+        self.tool_name = None
+        self.is_server_web_search = False
+        self.content_block_index = None
+
+
 class ToolCallEventProcessor(BaseProcessor):
     """Processor that handles tool use events in the streaming response."""
 
     @staticmethod
-    def _is_server_web_search_tool(tool_name: Optional[str], context: ClaudeAIContext) -> bool:
+    def _server_web_search_tool_names(context: ClaudeAIContext) -> frozenset[str]:
         """
-        Determine whether a tool_use block should be treated as server web search.
+        Collect the tool names that should be treated as server web search.
 
         Server web search should continue in the same stream and must not be paused
         like a client tool call.
         """
-        if tool_name != "web_search":
-            return False
-
         request = context.messages_api_request
         if not request or not request.tools:
-            return False
-
-        for tool in request.tools:
-            if getattr(tool, "name", None) != "web_search":
-                continue
+            return frozenset()
 
-            tool_type = getattr(tool, "type", None)
-            if (
-                isinstance(tool_type, str)
-                and (tool_type == "web_search_v0" or tool_type.startswith("web_search_"))
-            ):
-                return True
-
-        return False
+        return frozenset(
+            tool.name
+            for tool in request.tools
+            if tool.name == "web_search" and is_web_search_tool_type(tool.type)
+        )
 
     async def process(self, context: ClaudeAIContext) -> ClaudeAIContext:
         """
@@ -76,6 +95,61 @@ class ToolCallEventProcessor(BaseProcessor):
 
         return context
 
+    def _on_block_start(
+        self,
+        event: ContentBlockStartEvent,
+        state: _ToolState,
+        context: ClaudeAIContext,
+    ) -> int:
+        """Track tool use / tool result blocks when they start."""
+        content_block = event.content_block
+        if isinstance(content_block, ToolUseContent):
+            state.tool_use_id = content_block.id
+            state.tool_name = content_block.name
+            state.is_server_web_search = (
+                content_block.name in state.server_web_search_names
+            )
+            state.content_block_index = event.index
+            logger.debug(
+                f"Detected tool use start: {state.tool_use_id} "
+                f"(name: {content_block.name})"
+            )
+        elif isinstance(content_block, ToolResultContent):
+            state.tool_result_block_index = event.index
+            # 默认严格输出标准 Anthropic 事件：
+            # Claude Web 私有 tool_result（knowledge 列表）仅内部消费，不透传给 API 客户端。
+            logger.debug(f"Detected tool result: {content_block.tool_use_id}")
+
+        return _SKIP if state.tool_result_block_index is not None else _YIELD
+
+    def _on_block_stop(
+        self,
+        event: ContentBlockStopEvent,
+        state: _ToolState,
+        context: ClaudeAIContext,
+    ) -> int:
+        """Detect the end of a skipped tool result block or a tool use block."""
+        if state.tool_result_block_index is not None:
+            if event.index == state.tool_result_block_index:
+                logger.debug("Skipped tool result block ended")
+                state.tool_result_block_index = None
+            return _SKIP
+
+        if (
+            state.content_block_index is not None
+            and event.index == state.content_block_index
+        ):
+            logger.debug(f"Tool use block ended: {state.tool_use_id}")
+
+            # Server web search continues in the same SSE stream.
+            if state.is_server_web_search:
+                state.reset_tool_use()
+                return _YIELD
+
+            return _END_TOOL_USE
+
+        return _YIELD
+
     async def _process_tool_events(
         self,
         event_stream: AsyncIterator[StreamingEvent],
@@ -84,69 +158,34 @@ class ToolCallEventProcessor(BaseProcessor):
         """
         Process events and inject MessageDelta/MessageStop when tool use is detected.
         """
-        current_tool_use_id: Optional[str] = None
-        current_tool_name: Optional[str] = None
-        current_tool_is_server_web_search = False
-        tool_use_detected = False
-        content_block_index: Optional[int] = None
-        tool_result_detected = False
-        tool_result_block_index: Optional[int] = None
-
-        async for event in event_stream:
-            # Check for ContentBlockStartEvent with tool_use type
-            if isinstance(event.root, ContentBlockStartEvent):
-                if isinstance(event.root.content_block, ToolUseContent):
-                    current_tool_use_id = event.root.content_block.id
-                    current_tool_name = event.root.content_block.name
-                    current_tool_is_server_web_search = self._is_server_web_search_tool(
-                        current_tool_name, context
-                    )
-                    content_block_index = event.root.index
-                    tool_use_detected = True
-                    logger.debug(
-                        f"Detected tool use start: {current_tool_use_id} "
-                        f"(name: {event.root.content_block.name})"
-                    )
-                elif isinstance(event.root.content_block, ToolResultContent):
-                    tool_result_block_index = event.root.index
-                    # 默认严格输出标准 Anthropic 事件：
-                    # Claude Web 私有 tool_result（knowledge 列表）仅内部消费，不透传给 API 客户端。
-                    logger.debug(
-                        f"Detected tool result: {event.root.content_block.tool_use_id}"
-                    )
-                    tool_result_detected = True
+        state = _ToolState(
+            server_web_search_names=self._server_web_search_tool_names(context)
+        )
+        handlers = {
+            ContentBlockStartEvent: self._on_block_start,
+            ContentBlockStopEvent: self._on_block_stop,
+        }
+
+        # 暂停等待工具结果时及时关闭上游的事件处理链，每一层都会关闭自己的上游，
+        # 直到事件解析器；原始 SSE 流由会话持有，工具结果回传后仍会继续消费，不会被关闭
+        async with aclosing(event_stream):
+            async for event in event_stream:
+                root = event.root
+                handler = handlers.get(type(root))
+                if handler is not None:
+                    action = handler(root, state, context)
+                elif state.tool_result_block_index is not None:
+                    action = _SKIP
+                else:
+                    action = _YIELD
+
+                if action == _SKIP:
+                    logger.debug("Skipping tool result content block")
+                    continue
 
-            # Yield the original event
-            if tool_result_detected:
-                logger.debug("Skipping tool result content block")
-            else:
                 yield event
 
-            # Check for ContentBlockStopEvent for a tool use block
-            if isinstance(event.root, ContentBlockStopEvent):
-                if (
-                    tool_result_block_index is not None
-                    and event.root.index == tool_result_block_index
-                ):
-                    logger.debug("Skipped tool result block ended")
-                    tool_result_detected = False
-                    tool_result_block_index = None
-                if (
-                    tool_use_detected
-                    and content_block_index is not None
-                    and event.root.index == content_block_index
-                ):
-                    logger.debug(f"Tool use block ended: {current_tool_use_id}")
-
-                    # Server web search continues in the same SSE stream.
-                    if current_tool_is_server_web_search:
-                        current_tool_use_id = None
-                        current_tool_name = None
-                        current_tool_is_server_web_search = False
-                        tool_use_detected = False
-                        content_block_index = None
-                        continue
-
+                if action == _END_TOOL_USE:
                     message_delta = MessageDeltaEvent(
                         type="message_delta",
                         delta=MessageDeltaData(stop_reason="tool_use"),
@@ -158,9 +197,9 @@ class ToolCallEventProcessor(BaseProcessor):
                     yield StreamingEvent(root=message_stop)
 
                     # Register the tool call
-                    if current_tool_use_id and context.claude_session:
+                    if state.tool_use_id and context.claude_session:
                         tool_call_manager.register_tool_call(
-                            tool_use_id=current_tool_use_id,
+                            tool_use_id=state.tool_use_id,
                             session_id=context.claude_session.session_id,
                             message_id=context.collected_message.id
                             if context.collected_message
@@ -168,13 +207,9 @@ class ToolCallEventProcessor(BaseProcessor):
                         )
 
                         logger.info(
-                            f"Registered tool call {current_tool_use_id} for session {context.claude_session.session_id}"
+                            f"Registered tool call {state.tool_use_id} for session {context.claude_session.session_id}"
                         )
 
-                    current_tool_use_id = None
-                    current_tool_name = None
-                    current_tool_is_server_web_search = False
-                    tool_use_detected = False
-                    content_block_index = None
+                    state.reset_tool_use()
 
                     break
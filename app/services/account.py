@@ -1,14 +1,16 @@
 import asyncio
-import json
+import heapq
 import os
 import tempfile
 import threading
+import time
 import uuid
-from collections import defaultdict
 from datetime import datetime, UTC
-from typing import List, Optional, Dict, Set, Tuple
+from operator import itemgetter
+from typing import Iterator, List, Optional, Dict, Set, Tuple
 
 from loguru import logger
+from pydantic_core import from_json, to_json
 
 from app.core.config import settings
 from app.core.exceptions import (
@@ -17,8 +19,21 @@ from app.core.exceptions import (
     ClaudeRateLimitedError,
 )
 from app.core.account import Account, AccountStatus, AuthType, OAuthToken
+from app.core.http_client import AsyncSession, create_session
 from app.services.oauth import oauth_authenticator
 
+# 会话账户选择键：(会话数, 最近使用时间)
+_SESSION_SELECTION_KEY = itemgetter(0, 1)
+
+# 无会话账户的只读占位，避免读取时为每个账户分配空集合
+_EMPTY_SESSIONS: frozenset = frozenset()
+
+# OAuth Token 距过期不足该秒数时触发刷新
+_TOKEN_REFRESH_MARGIN = 300
+
+# 账户变更后延迟落盘的时间窗口（秒），窗口内的多次变更合并为一次写入
+_SAVE_DEBOUNCE_DELAY = 0.1
+
 
 class AccountManager:
     """
@@ -27,6 +42,7 @@ class AccountManager:
     """
 
     _instance: Optional["AccountManager"] = None
+    _initialized: bool = False
     _lock = threading.Lock()
 
     def __new__(cls):
@@ -39,17 +55,62 @@ class AccountManager:
 
     def __init__(self):
         """Initialize the AccountManager."""
-        self._accounts: Dict[str, Account] = {}  # organization_uuid -> Account
-        self._cookie_to_uuid: Dict[str, str] = {}  # cookie_value -> organization_uuid
-        self._session_accounts: Dict[str, str] = {}  # session_id -> organization_uuid
-        self._account_sessions: Dict[str, Set[str]] = defaultdict(
-            set
-        )  # organization_uuid -> set of session_ids
-        self._account_task: Optional[asyncio.Task] = None
-        self._max_sessions_per_account = settings.max_sessions_per_cookie
-        self._account_task_interval = settings.account_task_interval
-        # 异步写操作锁，保护账户增删改的并发安全
-        self._write_lock = asyncio.Lock()
+        # 单例的 __init__ 每次 AccountManager() 都会被调用，只初始化一次，避免清空已有状态
+        if self._initialized:
+            return
+
+        with self._lock:
+            if self._initialized:
+                return
+
+            self._accounts: Dict[str, Account] = {}  # organization_uuid -> Account
+            # cookie_value -> organization_uuid
+            self._cookie_to_uuid: Dict[str, str] = {}
+            # session_id -> organization_uuid
+            self._session_accounts: Dict[str, str] = {}
+            # organization_uuid -> set of session_ids（只保存有会话的账户）
+            self._account_sessions: Dict[str, Set[str]] = {}
+            # Web 会话候选索引：(is_pro, is_max) -> VALID 且支持 Cookie 的 organization_uuid 集合
+            self._session_candidates: Dict[Tuple[bool, bool], Set[str]] = {}
+            # 状态索引：status -> organization_uuid 集合，统计与恢复检查无需遍历全部账户
+            self._accounts_by_status: Dict[AccountStatus, Set[str]] = {
+                status: set() for status in AccountStatus
+            }
+            # OAuth Token 过期堆：(expires_at, organization_uuid)，按过期时间出堆刷新；
+            # _token_expiry 记录每个账户当前有效的堆项，其余视为过期项丢弃
+            self._expiry_heap: List[Tuple[float, str]] = []
+            self._token_expiry: Dict[str, float] = {}
+            # 正在刷新 Token 的账户，刷新结束前不重复入堆
+            self._refreshing_tokens: Set[str] = set()
+            # 大批 Token 同时到期时限制并发刷新数，避免集中压向 OAuth 端点
+            self._token_refresh_semaphore = asyncio.Semaphore(
+                settings.oauth_refresh_concurrency or 5
+            )
+            # 限流恢复堆：(resets_at 时间戳, organization_uuid)，同样以 _rate_limit_resets 校验堆项
+            self._reset_heap: List[Tuple[float, str]] = []
+            self._rate_limit_resets: Dict[str, float] = {}
+            # Cookie 验证结果缓存：cookie_value -> (验证时间 monotonic, capabilities)
+            self._cookie_validation_cache: Dict[
+                str, Tuple[float, Optional[List[str]]]
+            ] = {}
+            self._account_task: Optional[asyncio.Task] = None
+            self._max_sessions_per_account = settings.max_sessions_per_cookie
+            self._account_task_interval = settings.account_task_interval
+            # 账户增删改的写锁：临界区只有内存字典读写、不跨 await，
+            # 用同步锁即可，避免 asyncio.Lock 的调度开销；慢 I/O 与落盘均在锁外执行
+            self._write_lock = threading.Lock()
+            # 待执行的合并落盘回调
+            self._save_handle: Optional[asyncio.TimerHandle] = None
+            self._save_task: Optional[asyncio.Task] = None
+            # 限流探测复用的 HTTP 会话：(organization_uuid, proxy_url) -> AsyncSession
+            self._probe_sessions: Dict[Tuple[str, Optional[str]], AsyncSession] = {}
+            # 落盘在工作线程中执行：文件锁串行化写入，序号保证旧快照不会覆盖新快照
+            self._file_lock = threading.Lock()
+            self._save_seq = 0
+            self._written_seq = 0
+            self._written_data: Optional[Dict[str, dict]] = None
+
+            self._initialized = True
 
         logger.info("AccountManager initialized")
 
@@ -63,8 +124,10 @@ class AccountManager:
     ) -> Account:
         """Add a new account to the manager.
 
-        Uses double-checked locking to allow concurrent get_organization_info()
-        calls while serializing fast dict mutations and disk writes.
+        Uses double-checked locking: a lock-free lookup returns known cookies
+        immediately, concurrent get_organization_info() calls run unlocked and
+        the insert re-checks under the lock. Disk writes happen outside
+        the lock.
 
         Args:
             cookie_value: The cookie value (optional)
@@ -78,10 +141,15 @@ class AccountManager:
         if not cookie_value and not oauth_token:
             raise ValueError("Either cookie_value or oauth_token must be provided")
 
-        # Phase 1 (锁内，快): 检查 cookie 是否已存在，已存在则直接返回
-        async with self._write_lock:
-            if cookie_value and cookie_value in self._cookie_to_uuid:
-                return self._accounts[self._cookie_to_uuid[cookie_value]]
+        # Phase 1 (无锁，快): 检查 cookie 是否已存在，已存在则直接返回。
+        # 单次 dict 读取在 GIL 下是原子的；与并发删除交错时取不到账户，
+        # 交给 Phase 3 在锁内二次检查
+        if cookie_value:
+            existing_uuid = self._cookie_to_uuid.get(cookie_value)
+            if existing_uuid:
+                existing_account = self._accounts.get(existing_uuid)
+                if existing_account:
+                    return existing_account
 
         # Phase 2 (锁外，慢): 获取 org UUID，多个不同 cookie 可并行执行
         if cookie_value and (not organization_uuid or not capabilities):
@@ -92,8 +160,8 @@ class AccountManager:
             if fetched_uuid:
                 organization_uuid = fetched_uuid
 
-        # Phase 3 (锁内，快): 二次检查 + 创建 + 持久化
-        async with self._write_lock:
+        # Phase 3 (锁内，快): 二次检查 + 创建
+        with self._write_lock:
             # 二次检查 cookie 去重（其他并发请求可能已添加同一 cookie）
             if cookie_value and cookie_value in self._cookie_to_uuid:
                 return self._accounts[self._cookie_to_uuid[cookie_value]]
@@ -129,15 +197,18 @@ class AccountManager:
                 auth_type=auth_type,
             )
             self._accounts[organization_uuid] = account
-            self.save_accounts()
+            self._reindex_account(account)
 
             if cookie_value:
                 self._cookie_to_uuid[cookie_value] = organization_uuid
 
+        # 锁外: 持久化
+        self.request_save()
+
         logger.info(
-            f"Added new account: {organization_uuid[:8]}... "
+            f"Added new account: {account.short_id} "
             f"(auth_type: {auth_type.value}, "
-            f"cookie: {cookie_value[:20] + '...' if cookie_value else 'None'}, "
+            f"cookie: {account.cookie_short}, "
             f"oauth: {'Yes' if oauth_token else 'No'})"
         )
 
@@ -147,13 +218,91 @@ class AccountManager:
 
         return account
 
+    def _reindex_account(self, account: Account) -> None:
+        """Update the selection indexes after a registered account is added or changed."""
+        organization_uuid = account.organization_uuid
+        # 未注册（如 from_dict 构造中）或已移除的账户对象不得改动索引：
+        # 进行中的请求可能仍持有旧对象，而同一 UUID 已被重新添加为新对象
+        if self._accounts.get(organization_uuid) is not account:
+            return
+
+        self._unindex_account(organization_uuid)
+        self._accounts_by_status[account.status].add(organization_uuid)
+        self._schedule_token_refresh(account)
+        self._schedule_rate_limit_recovery(account)
+
+        # 请求中认证失败被标记为 INVALID 时，作废该 Cookie 的验证缓存
+        if account.status == AccountStatus.INVALID and account.cookie_value:
+            self._cookie_validation_cache.pop(account.cookie_value, None)
+
+        if account.status == AccountStatus.VALID and account.auth_type in (
+            AuthType.BOTH,
+            AuthType.COOKIE_ONLY,
+        ):
+            self._session_candidates.setdefault(
+                (account.is_pro, account.is_max), set()
+            ).add(organization_uuid)
+
+    def _unindex_account(self, organization_uuid: str) -> None:
+        """Drop an organization UUID from the selection indexes."""
+        for candidates in self._session_candidates.values():
+            candidates.discard(organization_uuid)
+        for members in self._accounts_by_status.values():
+            members.discard(organization_uuid)
+
+    def _schedule_token_refresh(self, account: Account) -> None:
+        """Queue an account's OAuth token on the expiry heap if it can be refreshed."""
+        organization_uuid = account.organization_uuid
+        token = account.oauth_token
+        if not (
+            account.auth_type in (AuthType.OAUTH_ONLY, AuthType.BOTH)
+            and token
+            and token.refresh_token
+            and token.expires_at
+        ):
+            self._token_expiry.pop(organization_uuid, None)
+            return
+
+        if (
+            organization_uuid in self._refreshing_tokens
+            or self._token_expiry.get(organization_uuid) == token.expires_at
+        ):
+            return
+
+        self._token_expiry[organization_uuid] = token.expires_at
+        heapq.heappush(self._expiry_heap, (token.expires_at, organization_uuid))
+
+    def _schedule_rate_limit_recovery(self, account: Account) -> None:
+        """Queue a rate-limited account on the reset heap if its reset time is known."""
+        organization_uuid = account.organization_uuid
+        if not (account.status == AccountStatus.RATE_LIMITED and account.resets_at):
+            self._rate_limit_resets.pop(organization_uuid, None)
+            return
+
+        resets_at = account.resets_at.timestamp()
+        if self._rate_limit_resets.get(organization_uuid) == resets_at:
+            return
+
+        self._rate_limit_resets[organization_uuid] = resets_at
+        heapq.heappush(self._reset_heap, (resets_at, organization_uuid))
+
+    def _next_task_delay(self) -> float:
+        """Seconds until the next due recovery or token refresh, capped at the task interval."""
+        now = datetime.now(UTC).timestamp()
+        delay = float(self._account_task_interval)
+        if self._reset_heap:
+            delay = min(delay, self._reset_heap[0][0] - now)
+        if self._expiry_heap:
+            delay = min(delay, self._expiry_heap[0][0] - _TOKEN_REFRESH_MARGIN - now)
+        return max(delay, 0.0)
+
     # 仅从内存中移除账户，不持久化到磁盘
     def _remove_account_from_memory(self, organization_uuid: str) -> None:
         """Remove an account from memory only, without saving to disk."""
         if organization_uuid in self._accounts:
             account = self._accounts[organization_uuid]
             sessions_to_remove = list(
-                self._account_sessions.get(organization_uuid, set())
+                self._account_sessions.get(organization_uuid, _EMPTY_SESSIONS)
             )
 
             for session_id in sessions_to_remove:
@@ -164,26 +313,34 @@ class AccountManager:
                 del self._cookie_to_uuid[account.cookie_value]
 
             del self._accounts[organization_uuid]
+            self._unindex_account(organization_uuid)
+            self._token_expiry.pop(organization_uuid, None)
+            self._rate_limit_resets.pop(organization_uuid, None)
+            self._refreshing_tokens.discard(organization_uuid)
+
+            from app.core.external.claude_client import ClaudeWebClient
+
+            ClaudeWebClient.evict_account_sessions(organization_uuid)
 
             if organization_uuid in self._account_sessions:
                 del self._account_sessions[organization_uuid]
 
-            logger.info(f"Removed account from memory: {organization_uuid[:8]}...")
+            logger.info(f"Removed account from memory: {account.short_id}")
 
     # 移除账户并持久化（保持原有单删行为）
     async def remove_account(self, organization_uuid: str) -> None:
         """Remove an account from the manager and persist to disk."""
-        async with self._write_lock:
+        with self._write_lock:
             self._remove_account_from_memory(organization_uuid)
-            self.save_accounts()
+        self.request_save()
 
     # 批量移除账户并单次持久化
     async def batch_remove_accounts(self, organization_uuids: List[str]) -> Dict:
         """Batch remove accounts and persist once. Returns success/failure stats."""
-        async with self._write_lock:
-            success_count = 0
-            failures: List[Dict] = []
+        success_count = 0
+        failures: List[Dict] = []
 
+        with self._write_lock:
             for org_uuid in organization_uuids:
                 if org_uuid not in self._accounts:
                     failures.append(
@@ -196,18 +353,33 @@ class AccountManager:
                 except Exception as e:
                     failures.append({"organization_uuid": org_uuid, "error": str(e)})
 
-            if success_count > 0:
-                self.save_accounts()
+        if success_count > 0:
+            self.request_save()
 
-            logger.info(
-                f"Batch remove: {success_count} succeeded, {len(failures)} failed"
-            )
+        logger.info(f"Batch remove: {success_count} succeeded, {len(failures)} failed")
 
-            return {
-                "success_count": success_count,
-                "failure_count": len(failures),
-                "failures": failures,
-            }
+        return {
+            "success_count": success_count,
+            "failure_count": len(failures),
+            "failures": failures,
+        }
+
+    def _iter_session_candidates(
+        self, is_pro: Optional[bool], is_max: Optional[bool]
+    ) -> Iterator[Account]:
+        """Yield VALID cookie-capable accounts matching the capability filters."""
+        # 只遍历索引中满足状态、认证方式和能力筛选的账户
+        for (
+            account_is_pro,
+            account_is_max,
+        ), candidates in self._session_candidates.items():
+            if is_pro is not None and account_is_pro != is_pro:
+                continue
+            if is_max is not None and account_is_max != is_max:
+                continue
+
+            for organization_uuid in candidates:
+                yield self._accounts[organization_uuid]
 
     async def get_account_for_session(
         self,
@@ -226,59 +398,45 @@ class AccountManager:
         Returns:
             Account instance if available
         """
-        # Convert single auth_type to list for uniform handling
-        if session_id in self._session_accounts:
-            organization_uuid = self._session_accounts[session_id]
-            if organization_uuid in self._accounts:
-                account = self._accounts[organization_uuid]
+        organization_uuid = self._session_accounts.get(session_id)
+        if organization_uuid is not None:
+            account = self._accounts.get(organization_uuid)
+            if account is not None:
                 if account.status == AccountStatus.VALID:
                     return account
                 else:
                     del self._session_accounts[session_id]
-                    self._account_sessions[organization_uuid].discard(session_id)
-
-        best_account = None
-        min_sessions = float("inf")
-        earliest_last_used = None
+                    self._discard_account_session(organization_uuid, session_id)
 
-        for organization_uuid, account in self._accounts.items():
-            if account.status != AccountStatus.VALID:
-                continue
-
-            # Filter by auth type if specified
-            if account.auth_type not in [AuthType.BOTH, AuthType.COOKIE_ONLY]:
-                continue
-
-            # Filter by capabilities if specified
-            if is_pro is not None and account.is_pro != is_pro:
-                continue
-            if is_max is not None and account.is_max != is_max:
-                continue
-
-            session_count = len(self._account_sessions[organization_uuid])
-            if session_count >= self._max_sessions_per_account:
-                continue
-
-            # Select account with least sessions
-            # If multiple accounts have the same least sessions, select the one with earliest last_used
-            if session_count < min_sessions or (
-                session_count == min_sessions
-                and (
-                    earliest_last_used is not None
-                    and account.last_used < earliest_last_used
+        # Select account with least sessions
+        # If multiple accounts have the same least sessions, select the one with earliest last_used
+        sessions_of = self._account_sessions.get
+        best = min(
+            (
+                (
+                    len(sessions_of(account.organization_uuid, _EMPTY_SESSIONS)),
+                    account.last_used_ts,
+                    account,
                 )
-            ):
-                min_sessions = session_count
-                earliest_last_used = account.last_used
-                best_account = account
+                for account in self._iter_session_candidates(is_pro, is_max)
+            ),
+            key=_SESSION_SELECTION_KEY,
+            default=None,
+        )
+        # 最少会话数已达上限，说明所有候选账户都已满载
+        best_account = (
+            best[2] if best and best[0] < self._max_sessions_per_account else None
+        )
 
         if best_account:
-            self._session_accounts[session_id] = best_account.organization_uuid
-            self._account_sessions[best_account.organization_uuid].add(session_id)
+            organization_uuid = best_account.organization_uuid
+            sessions = self._account_sessions.setdefault(organization_uuid, set())
+            sessions.add(session_id)
+            self._session_accounts[session_id] = organization_uuid
 
             logger.debug(
                 f"Assigned account to session {session_id}, "
-                f"account now has {len(self._account_sessions[best_account.organization_uuid])} sessions"
+                f"account now has {len(sessions)} sessions"
             )
 
             return best_account
@@ -301,11 +459,10 @@ class AccountManager:
             Account instance if available
         """
         earliest_account = None
-        earliest_last_used = None
+        earliest_last_used = float("inf")
 
-        for account in self._accounts.values():
-            if account.status != AccountStatus.VALID:
-                continue
+        for organization_uuid in self._accounts_by_status[AccountStatus.VALID]:
+            account = self._accounts[organization_uuid]
 
             if account.auth_type not in [AuthType.OAUTH_ONLY, AuthType.BOTH]:
                 continue
@@ -316,13 +473,13 @@ class AccountManager:
             if is_max is not None and account.is_max != is_max:
                 continue
 
-            if earliest_last_used is None or account.last_used < earliest_last_used:
-                earliest_last_used = account.last_used
+            if account.last_used_ts < earliest_last_used:
+                earliest_last_used = account.last_used_ts
                 earliest_account = account
 
         if earliest_account:
             logger.debug(
-                f"Selected OAuth account: {earliest_account.organization_uuid[:8]}... "
+                f"Selected OAuth account: {earliest_account.short_id} "
                 f"(last used: {earliest_account.last_used.isoformat()})"
             )
             return earliest_account
@@ -342,26 +499,35 @@ class AccountManager:
         account = self._accounts.get(account_id)
 
         if account and account.status == AccountStatus.VALID:
-            logger.debug(f"Retrieved account by ID: {account_id[:8]}...")
+            logger.debug(f"Retrieved account by ID: {account.short_id}")
             return account
 
         if account:
             logger.debug(
-                f"Account {account_id[:8]}... found but not valid: status={account.status}"
+                f"Account {account.short_id} found but not valid: status={account.status}"
             )
         else:
             logger.debug(f"Account {account_id[:8]}... not found")
 
         return None
 
+    def is_current(self, account: Account) -> bool:
+        """Check whether this exact Account object is still the registered one."""
+        return self._accounts.get(account.organization_uuid) is account
+
+    def _discard_account_session(self, organization_uuid: str, session_id: str) -> None:
+        """Remove a session from an account, dropping the account's empty set."""
+        sessions = self._account_sessions.get(organization_uuid)
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._account_sessions[organization_uuid]
+
     async def release_session(self, session_id: str) -> None:
         """Release a session's account assignment."""
-        if session_id in self._session_accounts:
-            organization_uuid = self._session_accounts[session_id]
-            del self._session_accounts[session_id]
-
-            if organization_uuid in self._account_sessions:
-                self._account_sessions[organization_uuid].discard(session_id)
+        organization_uuid = self._session_accounts.pop(session_id, None)
+        if organization_uuid is not None:
+            self._discard_account_session(organization_uuid, session_id)
 
             logger.debug(f"Released account for session {session_id}")
 
@@ -379,130 +545,188 @@ class AccountManager:
             except asyncio.CancelledError:
                 pass
 
+        await self._close_probe_sessions()
+
     async def _task_loop(self) -> None:
         """Background loop for AccountManager."""
         while True:
+            # 睡到下一个限流恢复或 Token 刷新到期为止，最长不超过任务间隔
+            delay = self._account_task_interval
             try:
                 await self._check_and_recover_accounts()
                 await self._check_and_refresh_accounts()
+                delay = self._next_task_delay()
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in task loop: {e}")
             finally:
-                await asyncio.sleep(self._account_task_interval)
+                await asyncio.sleep(delay)
 
     async def _check_and_recover_accounts(self) -> None:
         """Check and recover rate-limited accounts."""
-        current_time = datetime.now(UTC)
-
-        for account in self._accounts.values():
-            # Check rate-limited accounts
-            if (
-                account.status == AccountStatus.RATE_LIMITED
-                and account.resets_at
-                and current_time >= account.resets_at
-            ):
-                account.status = AccountStatus.VALID
-                account.resets_at = None
-                logger.info(
-                    f"Recovered rate-limited account: {account.organization_uuid[:8]}..."
-                )
+        now = datetime.now(UTC).timestamp()
+
+        # 只弹出已到重置时间的堆项，无需遍历全部限流账户
+        while self._reset_heap and self._reset_heap[0][0] <= now:
+            resets_at, organization_uuid = heapq.heappop(self._reset_heap)
+            if self._rate_limit_resets.get(organization_uuid) != resets_at:
+                continue  # 重置时间已更新、账户已恢复或已移除
+
+            del self._rate_limit_resets[organization_uuid]
+            account = self._accounts[organization_uuid]
+            account.status = AccountStatus.VALID
+            account.resets_at = None
+            logger.info(f"Recovered rate-limited account: {account.short_id}")
 
     async def _check_and_refresh_accounts(self) -> None:
         """Check and refresh expired/expiring tokens."""
-        current_timestamp = datetime.now(UTC).timestamp()
-
-        for account in self._accounts.values():
-            if (
-                account.auth_type in [AuthType.OAUTH_ONLY, AuthType.BOTH]
-                and account.oauth_token
-                and account.oauth_token.refresh_token
-                and account.oauth_token.expires_at
-            ):
-                if account.oauth_token.expires_at - current_timestamp < 300:
-                    asyncio.create_task(self._refresh_account_token(account))
+        deadline = datetime.now(UTC).timestamp() + _TOKEN_REFRESH_MARGIN
+
+        # 只弹出即将过期的堆项，无需遍历全部账户
+        while self._expiry_heap and self._expiry_heap[0][0] < deadline:
+            expires_at, organization_uuid = heapq.heappop(self._expiry_heap)
+            if self._token_expiry.get(organization_uuid) != expires_at:
+                continue  # Token 已更新或账户已移除
+
+            del self._token_expiry[organization_uuid]
+            self._refreshing_tokens.add(organization_uuid)
+            account = self._accounts[organization_uuid]
+            asyncio.create_task(self._refresh_account_token(account))
 
     async def _refresh_account_token(self, account: Account) -> None:
         """Refresh OAuth token for an account."""
-        logger.info(
-            f"Refreshing OAuth token for account: {account.organization_uuid[:8]}..."
-        )
+        success = False
+        try:
+            async with self._token_refresh_semaphore:
+                logger.info(f"Refreshing OAuth token for account: {account.short_id}")
+                success = await oauth_authenticator.refresh_account_token(account)
 
-        success = await oauth_authenticator.refresh_account_token(account)
-        if success:
-            logger.info(
-                f"Successfully refreshed OAuth token for account: {account.organization_uuid[:8]}..."
-            )
-        else:
-            logger.warning(
-                f"Failed to refresh OAuth token for account: {account.organization_uuid[:8]}..."
-            )
-            if account.auth_type == AuthType.BOTH:
-                account.auth_type = AuthType.COOKIE_ONLY
-                account.oauth_token = None
+            if success:
+                logger.info(
+                    f"Successfully refreshed OAuth token for account: {account.short_id}"
+                )
             else:
-                account.status = AccountStatus.INVALID
-                logger.error(
-                    f"Account {account.organization_uuid[:8]} is now invalid due to OAuth refresh failure"
+                logger.warning(
+                    f"Failed to refresh OAuth token for account: {account.short_id}"
                 )
-            self.save_accounts()
+                if account.auth_type == AuthType.BOTH:
+                    account.auth_type = AuthType.COOKIE_ONLY
+                    account.oauth_token = None
+                else:
+                    account.status = AccountStatus.INVALID
+                    logger.error(
+                        f"Account {account.short_id} is now invalid due to OAuth refresh failure"
+                    )
+                self.request_save()
+        finally:
+            self._refreshing_tokens.discard(account.organization_uuid)
+            if success:
+                # 新 Token 按其过期时间入堆
+                self._requeue_token_refresh(account)
+            else:
+                # 仍可刷新（Token 未变）的账户隔一个任务间隔再入堆重试，
+                # 避免按到期时间调度的任务循环立即反复重试
+                asyncio.get_running_loop().call_later(
+                    self._account_task_interval, self._requeue_token_refresh, account
+                )
+
+    def _requeue_token_refresh(self, account: Account) -> None:
+        """Put an account back on the expiry heap unless it has been removed."""
+        if self._accounts.get(account.organization_uuid) is account:
+            self._schedule_token_refresh(account)
 
     async def _attempt_oauth_authentication(self, account: Account) -> None:
         """Attempt OAuth authentication for an account."""
 
-        logger.info(
-            f"Attempting OAuth authentication for account: {account.organization_uuid[:8]}..."
-        )
+        logger.info(f"Attempting OAuth authentication for account: {account.short_id}")
 
         success = await oauth_authenticator.authenticate_account(account)
         if not success:
             logger.warning(
-                f"OAuth authentication failed for account: {account.organization_uuid[:8]}..., keeping as CookieOnly"
+                f"OAuth authentication failed for account: {account.short_id}, keeping as CookieOnly"
             )
         else:
             logger.info(
-                f"OAuth authentication successful for account: {account.organization_uuid[:8]}..."
+                f"OAuth authentication successful for account: {account.short_id}"
             )
 
-    async def get_status(self) -> Dict:
-        """Get the current status of all accounts."""
+    async def get_status(self, include_accounts: bool = True) -> Dict:
+        """Get the current status of all accounts.
+
+        Args:
+            include_accounts: Whether to include the per-account details list.
+                Callers that only need the totals can skip building it.
+        """
+        # 各状态计数直接取自状态索引，无需遍历账户
         status = {
             "total_accounts": len(self._accounts),
-            "valid_accounts": sum(
-                1 for a in self._accounts.values() if a.status == AccountStatus.VALID
-            ),
-            "rate_limited_accounts": sum(
-                1
-                for a in self._accounts.values()
-                if a.status == AccountStatus.RATE_LIMITED
-            ),
-            "invalid_accounts": sum(
-                1 for a in self._accounts.values() if a.status == AccountStatus.INVALID
+            "valid_accounts": len(self._accounts_by_status[AccountStatus.VALID]),
+            "rate_limited_accounts": len(
+                self._accounts_by_status[AccountStatus.RATE_LIMITED]
             ),
+            "invalid_accounts": len(self._accounts_by_status[AccountStatus.INVALID]),
             "active_sessions": len(self._session_accounts),
             "accounts": [],
         }
 
-        for organization_uuid, account in self._accounts.items():
-            account_info = {
-                "organization_uuid": organization_uuid[:8] + "...",
-                "cookie": account.cookie_value[:20] + "..."
-                if account.cookie_value
-                else "None",
+        if not include_accounts:
+            return status
+
+        sessions_of = self._account_sessions.get
+        status["accounts"] = [
+            {
+                "organization_uuid": account.short_id,
+                "cookie": account.cookie_short or "None",
                 "status": account.status.value,
                 "auth_type": account.auth_type.value,
-                "sessions": len(self._account_sessions[organization_uuid]),
+                "sessions": len(sessions_of(organization_uuid, _EMPTY_SESSIONS)),
                 "last_used": account.last_used.isoformat(),
                 "resets_at": account.resets_at.isoformat()
                 if account.resets_at
                 else None,
                 "has_oauth": account.oauth_token is not None,
             }
-            status["accounts"].append(account_info)
+            for organization_uuid, account in self._accounts.items()
+        ]
 
         return status
 
+    def _get_probe_session(
+        self, key: Tuple[str, Optional[str]], proxy_url: Optional[str]
+    ) -> AsyncSession:
+        """Get or lazily create the pooled HTTP session for rate limit probes."""
+        session = self._probe_sessions.get(key)
+        if session is None:
+            session = create_session(
+                timeout=30,
+                impersonate="chrome",
+                proxy=proxy_url,
+            )
+            self._probe_sessions[key] = session
+        return session
+
+    async def _discard_probe_session(
+        self, key: Tuple[str, Optional[str]], session: AsyncSession
+    ) -> None:
+        """Drop and close a pooled probe session."""
+        if self._probe_sessions.get(key) is session:
+            del self._probe_sessions[key]
+        try:
+            await session.close()
+        except Exception:
+            pass
+
+    async def _close_probe_sessions(self) -> None:
+        """Close all pooled probe sessions."""
+        sessions = list(self._probe_sessions.values())
+        self._probe_sessions.clear()
+        for session in sessions:
+            try:
+                await session.close()
+            except Exception as e:
+                logger.warning(f"Failed to close probe session: {e}")
+
     # 最小聊天测试，探测限流是否已解除
     async def _probe_rate_limit(
         self, account: Account
@@ -517,16 +741,11 @@ class AccountManager:
 
         if has_oauth and account.oauth_token:
             # OAuth 路径：直接 POST /v1/messages（最小请求）
-            from app.core.http_client import create_session
-
             proxy_url = await proxy_service.get_proxy(
                 account_id=account.organization_uuid
             )
-            session = create_session(
-                timeout=30,
-                impersonate="chrome",
-                proxy=proxy_url,
-            )
+            probe_key = (account.organization_uuid, proxy_url)
+            session = self._get_probe_session(probe_key, proxy_url)
             try:
                 api_base = settings.claude_api_baseurl.encoded_string().rstrip("/")
                 url = f"{api_base}/v1/messages"
@@ -566,18 +785,17 @@ class AccountManager:
 
                 return ("error", None)
             except Exception as e:
-                logger.warning(
-                    f"OAuth probe failed for {account.organization_uuid[:8]}...: {e}"
-                )
+                logger.warning(f"OAuth probe failed for {account.short_id}: {e}")
+                # 连接可能已失效，下次探测重新建立会话
+                await self._discard_probe_session(probe_key, session)
                 return ("error", None)
-            finally:
-                await session.close()
         else:
             # Cookie-only 路径：使用 ClaudeWebClient
             from app.core.external.claude_client import ClaudeWebClient
 
             client = ClaudeWebClient(account)
             conv_uuid = None
+            response = None
             try:
                 await client.initialize()
                 conv_uuid, _ = await client.create_conversation()
@@ -587,16 +805,20 @@ class AccountManager:
                     "timezone": "UTC",
                     "attachments": [],
                 }
-                await client.send_message(payload, conv_uuid)
+                response = await client.send_message(payload, conv_uuid)
                 return ("valid", None)
             except ClaudeRateLimitedError as e:
                 return ("rate_limited", e.resets_at)
             except Exception as e:
-                logger.warning(
-                    f"Cookie probe failed for {account.organization_uuid[:8]}...: {e}"
-                )
+                logger.warning(f"Cookie probe failed for {account.short_id}: {e}")
                 return ("error", None)
             finally:
+                # 探测只关心状态码：中止未读的流式响应，HTTP 会话归还连接池前必须是干净的
+                if response is not None:
+                    try:
+                        await response.aclose()
+                    except Exception:
+                        pass
                 if conv_uuid:
                     try:
                         await client.delete_conversation(conv_uuid)
@@ -604,6 +826,90 @@ class AccountManager:
                         pass
                 await client.cleanup()
 
+    def _get_cached_cookie_validation(self, cookie_value: str) -> Optional[List[str]]:
+        """Return cached capabilities if the cookie was validated within the TTL.
+
+        Returns None on a cache miss. A hit with unknown capabilities returns an
+        empty list.
+        """
+        entry = self._cookie_validation_cache.get(cookie_value)
+        if entry is None:
+            return None
+
+        validated_at, capabilities = entry
+        if time.monotonic() - validated_at >= settings.cookie_revalidation_ttl:
+            del self._cookie_validation_cache[cookie_value]
+            return None
+
+        return capabilities or []
+
+    def _cache_cookie_validation(
+        self, cookie_value: str, capabilities: Optional[List[str]]
+    ) -> None:
+        """Remember a successful cookie validation."""
+        if settings.cookie_revalidation_ttl <= 0:
+            return
+
+        now = time.monotonic()
+        # 顺带清理已过期的条目，避免已删除或更换的 Cookie 常驻内存
+        expired = [
+            cookie
+            for cookie, (validated_at, _) in self._cookie_validation_cache.items()
+            if now - validated_at >= settings.cookie_revalidation_ttl
+        ]
+        for cookie in expired:
+            del self._cookie_validation_cache[cookie]
+
+        self._cookie_validation_cache[cookie_value] = (now, capabilities)
+
+    async def _validate_account_cookie(
+        self, account: Account
+    ) -> Tuple[Optional[bool], Optional[List[str]]]:
+        """Validate an account's cookie for a status refresh.
+
+        Returns:
+            (cookie_valid, capabilities), where cookie_valid is True / False, or
+            None when there is no cookie or the result is inconclusive
+        """
+        if not account.cookie_value:
+            return None, None
+
+        # TTL 内验证过的 Cookie 直接复用结果
+        cached_validation = self._get_cached_cookie_validation(account.cookie_value)
+        if cached_validation is not None:
+            return True, cached_validation
+
+        try:
+            _, capabilities = await oauth_authenticator.get_organization_info(
+                account.cookie_value
+            )
+        except ClaudeAuthenticationError:
+            self._cookie_validation_cache.pop(account.cookie_value, None)
+            return False, None
+        except Exception as e:
+            # 网络/代理等非认证错误，不误判
+            logger.warning(
+                f"Cookie validation inconclusive for {account.short_id}: {e}"
+            )
+            return None, None
+
+        self._cache_cookie_validation(account.cookie_value, capabilities)
+        return True, capabilities
+
+    async def _refresh_account_oauth(self, account: Account) -> None:
+        """Refresh an account's OAuth token for a status refresh, if it has one."""
+        if not (
+            account.auth_type in (AuthType.OAUTH_ONLY, AuthType.BOTH)
+            and account.oauth_token
+            and account.oauth_token.refresh_token
+        ):
+            return
+
+        try:
+            await oauth_authenticator.refresh_account_token(account)
+        except Exception as e:
+            logger.warning(f"OAuth refresh failed for {account.short_id}: {e}")
+
     # 刷新单个账户状态
     async def refresh_account_status(self, organization_uuid: str) -> Dict:
         """Refresh a single account's status by validating credentials and probing rate limits.
@@ -621,38 +927,12 @@ class AccountManager:
             }
 
         previous_status = account.status.value
-        cookie_valid: Optional[bool] = None  # True / False / None(不确定)
-        new_capabilities: Optional[list] = None
 
-        # Phase 1 (锁外): Cookie 验证
-        if account.cookie_value:
-            try:
-                _, capabilities = await oauth_authenticator.get_organization_info(
-                    account.cookie_value
-                )
-                cookie_valid = True
-                new_capabilities = capabilities
-            except ClaudeAuthenticationError:
-                cookie_valid = False
-            except Exception as e:
-                # 网络/代理等非认证错误，不误判
-                logger.warning(
-                    f"Cookie validation inconclusive for {organization_uuid[:8]}...: {e}"
-                )
-                cookie_valid = None
-
-        # 锁外: OAuth 刷新（如有 OAuth token）
-        if (
-            account.auth_type in (AuthType.OAUTH_ONLY, AuthType.BOTH)
-            and account.oauth_token
-            and account.oauth_token.refresh_token
-        ):
-            try:
-                await oauth_authenticator.refresh_account_token(account)
-            except Exception as e:
-                logger.warning(
-                    f"OAuth refresh failed for {organization_uuid[:8]}...: {e}"
-                )
+        # Phase 1 (锁外): Cookie 验证与 OAuth 刷新互不依赖，并发执行
+        (cookie_valid, new_capabilities), _ = await asyncio.gather(
+            self._validate_account_cookie(account),
+            self._refresh_account_oauth(account),
+        )
 
         # Phase 2 (锁外): 限流探测（仅 RATE_LIMITED + Cookie 有效时）
         probe_result: Optional[str] = None
@@ -661,7 +941,7 @@ class AccountManager:
             probe_result, probe_resets_at = await self._probe_rate_limit(account)
 
         # 锁内: 状态更新
-        async with self._write_lock:
+        with self._write_lock:
             if account.status == AccountStatus.RATE_LIMITED:
                 # RATE_LIMITED 账户的状态转换
                 if cookie_valid is False:
@@ -696,12 +976,12 @@ class AccountManager:
                     account.capabilities = new_capabilities
                 # cookie_valid None: 不变
 
-            self.save_accounts()
+        # 锁外: 持久化
+        self.request_save()
 
         new_status = account.status.value
         logger.info(
-            f"Refreshed account {organization_uuid[:8]}...: "
-            f"{previous_status} -> {new_status}"
+            f"Refreshed account {account.short_id}: {previous_status} -> {new_status}"
         )
 
         return {
@@ -746,35 +1026,102 @@ class AccountManager:
             "results": list(results),
         }
 
-    # 保存所有账户到 JSON 文件（原子写入：临时文件 + os.replace）
-    def save_accounts(self) -> None:
-        """Save all accounts to JSON file using atomic write."""
-        if settings.no_filesystem_mode:
-            logger.debug("No-filesystem mode enabled, skipping account save to disk")
+    # 请求落盘：短时间内的多次变更（批量导入、批量刷新等）合并为一次写入
+    def request_save(self) -> None:
+        """Schedule a debounced save of all accounts."""
+        if self._save_handle is not None:
             return
 
-        settings.data_folder.mkdir(parents=True, exist_ok=True)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 不在事件循环中（如启动阶段），直接同步保存
+            self.save_accounts()
+            return
 
-        accounts_file = settings.data_folder / "accounts.json"
+        self._save_handle = loop.call_later(_SAVE_DEBOUNCE_DELAY, self._flush_save)
+
+    def _flush_save(self) -> None:
+        """Run a pending debounced save in the background."""
+        self._save_handle = None
+        self._save_task = asyncio.create_task(self._save_in_background())
+
+    async def _save_in_background(self) -> None:
+        """Save accounts off the event loop, logging failures."""
+        try:
+            await self.save_accounts_async()
+        except Exception as e:
+            logger.error(f"Failed to save accounts: {e}")
 
+    def _snapshot_accounts(self) -> Tuple[int, Dict[str, dict]]:
+        """Capture a numbered snapshot of all accounts for saving."""
+        self._save_seq += 1
         accounts_data = {
             organization_uuid: account.to_dict()
             for organization_uuid, account in self._accounts.items()
         }
+        return self._save_seq, accounts_data
 
-        # 原子写入：先写临时文件，再替换正式文件
-        fd, tmp_path = tempfile.mkstemp(dir=settings.data_folder, suffix=".tmp")
-        try:
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                json.dump(accounts_data, f, indent=2)
-            os.replace(tmp_path, str(accounts_file))
-        except Exception:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-            raise
+    def _write_accounts(self, seq: int, accounts_data: Dict[str, dict]) -> None:
+        """Write an accounts snapshot to disk using atomic write."""
+        with self._file_lock:
+            # 线程中的写入可能晚于更新的快照完成，旧快照不得覆盖新数据
+            if seq < self._written_seq:
+                return
+
+            # 内容与上次写入完全相同时（如刷新后状态未变）跳过序列化与磁盘写入
+            if accounts_data == self._written_data:
+                self._written_seq = seq
+                return
+
+            settings.data_folder.mkdir(parents=True, exist_ok=True)
+
+            accounts_file = settings.data_folder / "accounts.json"
+
+            # 原子写入：先写临时文件，再替换正式文件
+            fd, tmp_path = tempfile.mkstemp(dir=settings.data_folder, suffix=".tmp")
+            try:
+                # 用 pydantic-core 的 Rust 序列化器一次性生成带缩进的 UTF-8 字节，
+                # 标准库 json 在 indent 模式下会退回纯 Python 编码器并逐块写入
+                with os.fdopen(fd, "wb") as f:
+                    f.write(to_json(accounts_data, indent=2))
+                os.replace(tmp_path, str(accounts_file))
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+            self._written_seq = seq
+            self._written_data = accounts_data
 
         logger.info(f"Saved {len(accounts_data)} accounts to {accounts_file}")
 
+    # 保存所有账户到 JSON 文件（原子写入：临时文件 + os.replace）
+    def save_accounts(self) -> None:
+        """Save all accounts to JSON file, blocking until written."""
+        # 立即保存会覆盖所有待合并的变更，取消尚未执行的延迟落盘
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+
+        if settings.no_filesystem_mode:
+            logger.debug("No-filesystem mode enabled, skipping account save to disk")
+            return
+
+        self._write_accounts(*self._snapshot_accounts())
+
+    async def save_accounts_async(self) -> None:
+        """Save all accounts to JSON file without blocking the event loop.
+
+        The snapshot is taken on the event loop; JSON serialization and the
+        file write run in a worker thread.
+        """
+        if settings.no_filesystem_mode:
+            logger.debug("No-filesystem mode enabled, skipping account save to disk")
+            return
+
+        await asyncio.to_thread(self._write_accounts, *self._snapshot_accounts())
+
     def load_accounts(self) -> None:
         """Load accounts from JSON file.
 
@@ -792,16 +1139,27 @@ class AccountManager:
             return
 
         try:
-            with open(accounts_file, "r", encoding="utf-8") as f:
-                accounts_data = json.load(f)
-
-            for organization_uuid, account_data in accounts_data.items():
-                account = Account.from_dict(account_data)
-                self._accounts[organization_uuid] = account
-
-                # Rebuild cookie mapping
-                if account.cookie_value:
-                    self._cookie_to_uuid[account.cookie_value] = organization_uuid
+            # 与保存对称，用 pydantic-core 直接解析原始字节
+            with open(accounts_file, "rb") as f:
+                accounts_data = from_json(f.read())
+
+            # 先完整构造全部账户，文件中任一条目损坏时不会只加载一半
+            accounts = {
+                organization_uuid: Account.from_dict(account_data)
+                for organization_uuid, account_data in accounts_data.items()
+            }
+            self._accounts.update(accounts)
+            for account in accounts.values():
+                self._reindex_account(account)
+
+            # Rebuild cookie mapping
+            self._cookie_to_uuid.update(
+                {
+                    account.cookie_value: organization_uuid
+                    for organization_uuid, account in accounts.items()
+                    if account.cookie_value
+                }
+            )
 
             logger.info(f"Loaded {len(accounts_data)} accounts from {accounts_file}")
 
@@ -1,17 +1,31 @@
-import json
-from typing import Any, AsyncIterator, Optional
+import re
+from typing import Any, AsyncIterator, Optional, get_args
 from dataclasses import dataclass
 from loguru import logger
 
 from pydantic import ValidationError
+from pydantic_core import from_json
 
 from app.models.streaming import (
     StreamingEvent,
     UnknownEvent,
 )
 
+# 只提取用到的 event / data 字段，注释行与其他字段在正则引擎中直接跳过
+_SSE_FIELD_RE = re.compile(r"^(event|data)(?::[ ]?(.*))?$", re.MULTILINE)
 
-@dataclass
+# 事件 type -> StreamingEvent 中对应的专门模型。已知类型直接用对应模型校验，
+# 省去联合类型逐个尝试成员的开销；其余类型校验失败后会被记住，不再反复校验
+_EVENT_MODELS = {
+    event_type: model
+    for model in get_args(StreamingEvent.model_fields["root"].annotation)
+    for event_type in get_args(model.model_fields["type"].annotation)
+}
+_MODELED_EVENT_TYPES = frozenset(_EVENT_MODELS)
+_MAX_UNMODELED_EVENT_TYPES = 128
+
+
+@dataclass(slots=True)
 class SSEMessage:
     event: Optional[str] = None
     data: Optional[str] = None
@@ -22,7 +36,6 @@ class EventParser:
 
     def __init__(self, skip_unknown_events: bool = True):
         self.skip_unknown_events = skip_unknown_events
-        self.buffer = ""
 
     async def parse_stream(
         self, stream: AsyncIterator[str]
@@ -30,88 +43,160 @@ class EventParser:
         """
         Parse an SSE stream and yield StreamingEvent objects.
 
+        Buffering state and the set of unmodeled event types are local to each
+        call, so a single parser instance can be shared across concurrent
+        streams.
+
         Args:
             stream: AsyncIterator that yields string chunks from the SSE stream
 
         Yields:
             StreamingEvent objects parsed from the stream
         """
+        buffer = ""
+        # 上一块以 \r 结尾时暂存，与下一块开头的 \n 合并，避免 \r\n 跨块时残留 \r
+        pending_cr = False
+        # 本流中已确认无法校验为标准事件的 type，后续同类事件跳过 Pydantic 校验与异常开销
+        unmodeled_event_types: set[str] = set()
+
         async for chunk in stream:
+            if pending_cr:
+                chunk = "\r" + chunk
+            pending_cr = chunk.endswith("\r")
+            if pending_cr:
+                chunk = chunk[:-1]
             chunk = chunk.replace('\r\n', '\n') # Normalize line endings
-            self.buffer += chunk
-
-            async for event in self._process_buffer():
-                logger.debug(f"Parsed event:\n{event.model_dump()}")
-                yield event
+            # 剩余缓冲中不含完整分隔符，新分隔符最早从其最后一个字符开始，无需重扫旧内容
+            scan_from = max(len(buffer) - 1, 0)
+            buffer += chunk
 
-        async for event in self.flush():
-            yield event
+            message_texts, buffer = self._split_messages(buffer, scan_from)
+            for message_text in message_texts:
+                event = self._process_message(message_text, unmodeled_event_types)
+                if event:
+                    # 延迟到 DEBUG 日志实际输出时才序列化事件
+                    logger.opt(lazy=True).debug("Parsed event:\n{}", event.model_dump)
+                    yield event
 
-    async def _process_buffer(self) -> AsyncIterator[StreamingEvent]:
-        """Process the buffer and yield complete SSE messages as StreamingEvent objects."""
-        while "\n\n" in self.buffer:
-            message_end = self.buffer.index("\n\n")
-            message_text = self.buffer[:message_end]
-            self.buffer = self.buffer[message_end + 2 :]
+        if pending_cr:
+            buffer += "\r"
 
-            sse_msg = self._parse_sse_message(message_text)
+        # Flush any incomplete message left when the stream ends
+        if buffer.strip():
+            logger.warning(f"Flushing incomplete buffer: {buffer[:100]}...")
 
-            if sse_msg.data:
-                event = self._create_streaming_event(sse_msg)
+            message_texts, _ = self._split_messages(buffer + "\n\n")
+            for message_text in message_texts:
+                event = self._process_message(message_text, unmodeled_event_types)
                 if event:
                     yield event
 
+    def _split_messages(self, buffer: str, scan_from: int = 0) -> tuple[list[str], str]:
+        """Split complete SSE messages off the buffer, returning them and the remainder.
+
+        The search for separators starts at ``scan_from``; the buffer is sliced
+        once for the remainder instead of after every message.
+        """
+        message_texts = []
+        start = 0
+        message_end = buffer.find("\n\n", scan_from)
+        while message_end != -1:
+            message_texts.append(buffer[start:message_end])
+            start = message_end + 2
+            message_end = buffer.find("\n\n", start)
+
+        return message_texts, buffer[start:] if start else buffer
+
+    def _process_message(
+        self, message_text: str, unmodeled_event_types: set[str]
+    ) -> Optional[StreamingEvent]:
+        """Turn a complete SSE message into a StreamingEvent, if it carries data."""
+        sse_msg = self._parse_sse_message(message_text)
+
+        if sse_msg.data:
+            return self._create_streaming_event(sse_msg, unmodeled_event_types)
+
+        return None
+
     def _parse_sse_message(self, message_text: str) -> SSEMessage:
         """Parse a single SSE message from text."""
-        sse_msg = SSEMessage()
-
-        for line in message_text.split("\n"):
-            if not line:
-                continue
+        event = None
+        data_parts = []
 
-            if ":" not in line:
-                field = line
-                value = ""
+        for field, value in _SSE_FIELD_RE.findall(message_text):
+            if field == "data":
+                data_parts.append(value)
             else:
-                field, value = line.split(":", 1)
-                if value.startswith(" "):
-                    value = value[1:]
+                event = value
 
-            if field == "event":
-                sse_msg.event = value
-            elif field == "data":
-                if sse_msg.data is None:
-                    sse_msg.data = value
-                else:
-                    sse_msg.data += "\n" + value
-
-        return sse_msg
+        return SSEMessage(
+            event=event, data="\n".join(data_parts) if data_parts else None
+        )
 
-    def _create_streaming_event(self, sse_msg: SSEMessage) -> Optional[StreamingEvent]:
+    def _create_streaming_event(
+        self, sse_msg: SSEMessage, unmodeled_event_types: set[str]
+    ) -> Optional[StreamingEvent]:
         """
         Create a StreamingEvent from an SSE message.
 
         Args:
             sse_msg: The parsed SSE message
+            unmodeled_event_types: Event types of the current stream that are
+                known not to validate, updated in place
 
         Returns:
             StreamingEvent object or None if parsing fails
         """
+        # 只有 JSON 对象能转换为事件：[DONE] 等非对象帧不进入 JSON 解析，
+        # 也不再走解析失败的异常与错误日志路径
+        data_text = sse_msg.data
+        if data_text[0] != "{" and not data_text.lstrip().startswith("{"):
+            logger.debug(f"Skipping non-object SSE data: {data_text[:100]}")
+            return None
+
         try:
-            data = json.loads(sse_msg.data)
+            data = from_json(data_text)
 
-        except json.JSONDecodeError as e:
+        # pydantic_core 解析失败时抛出 ValueError
+        except ValueError as e:
             logger.error(f"Failed to parse JSON data: {e}")
             logger.debug(f"Raw data: {sse_msg.data}")
             return None
 
-        data = self._normalize_private_event(data)
-        if data is None:
-            return None
+        # 只有私有 citation 事件需要规范化：先在原始文本上做子串检查，
+        # 绝大多数事件无需进入 _normalize_private_event
+        if "citation_start_delta" in data_text:
+            data = self._normalize_private_event(data)
+            if data is None:
+                return None
+
+        event_type = data.get("type")
+        if isinstance(event_type, str):
+            if event_type in unmodeled_event_types:
+                if self.skip_unknown_events:
+                    return None
+                return StreamingEvent(root=UnknownEvent(type=sse_msg.event, data=data))
+
+            event_model = _EVENT_MODELS.get(event_type)
+            if event_model is not None:
+                try:
+                    # 已由专门模型完整校验，外层 RootModel 无需再校验一遍
+                    return StreamingEvent.model_construct(
+                        root=event_model.model_validate(data)
+                    )
+                except ValidationError:
+                    pass  # 如未知 delta 类型：交给下面的联合类型校验决定
 
         try:
             streaming_event = StreamingEvent(root=data)
         except ValidationError:
+            if (
+                isinstance(event_type, str)
+                and event_type not in _MODELED_EVENT_TYPES
+                and len(unmodeled_event_types) < _MAX_UNMODELED_EVENT_TYPES
+            ):
+                unmodeled_event_types.add(event_type)
+
             if self.skip_unknown_events:
                 logger.debug(f"Skipping unknown event: {sse_msg.event}")
                 return None
@@ -134,20 +219,16 @@ class EventParser:
             return data
 
         delta = data.get("delta")
-        if not isinstance(delta, dict):
-            return data
-
-        delta_type = delta.get("type")
-        if delta_type != "citation_start_delta":
+        if not isinstance(delta, dict) or delta.get("type") != "citation_start_delta":
             return data
 
         citation = self._convert_private_citation(delta.get("citation"))
         if not citation:
             return None
 
-        normalized = data.copy()
-        normalized["delta"] = {"type": "citations_delta", "citation": citation}
-        return normalized
+        # data 是刚解析出的新对象，没有其他引用，直接替换 delta 即可，无需复制
+        data["delta"] = {"type": "citations_delta", "citation": citation}
+        return data
 
     def _convert_private_citation(self, raw: Any) -> Optional[dict[str, Any]]:
         """
@@ -163,12 +244,12 @@ class EventParser:
         if not isinstance(url, str) or not url:
             return None
 
-        title = raw.get("title") if isinstance(raw.get("title"), str) else None
-        encrypted_index = (
-            raw.get("uuid")
-            if isinstance(raw.get("uuid"), str) and raw.get("uuid")
-            else url
-        )
+        title = raw.get("title")
+        if not isinstance(title, str):
+            title = None
+        encrypted_index = raw.get("uuid")
+        if not isinstance(encrypted_index, str) or not encrypted_index:
+            encrypted_index = url
         cited_text = title or ""
 
         return {
@@ -178,20 +259,3 @@ class EventParser:
             "title": title,
             "url": url,
         }
-
-    async def flush(self) -> AsyncIterator[StreamingEvent]:
-        """
-        Flush any remaining data in the buffer.
-
-        This should be called when the stream ends to process any incomplete messages.
-
-        Yields:
-            Any remaining StreamingEvent objects
-        """
-        if self.buffer.strip():
-            logger.warning(f"Flushing incomplete buffer: {self.buffer[:100]}...")
-
-            self.buffer += "\n\n"
-
-            async for event in self._process_buffer():
-                yield event
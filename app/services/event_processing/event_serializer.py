@@ -1,4 +1,5 @@
 import json
+from contextlib import aclosing
 from typing import AsyncIterator, Optional
 
 from app.models.streaming import StreamingEvent, UnknownEvent
@@ -22,10 +23,11 @@ class EventSerializer:
         Yields:
             String chunks in SSE format
         """
-        async for event in events:
-            sse_message = self.serialize_event(event)
-            if sse_message:
-                yield sse_message
+        async with aclosing(events):
+            async for event in events:
+                sse_message = self.serialize_event(event)
+                if sse_message:
+                    yield sse_message
 
     def serialize_event(self, event: StreamingEvent) -> Optional[str]:
         """
@@ -360,7 +360,7 @@ class OAuthAuthenticator:
             account.save()
 
             logger.info(
-                f"Successfully authenticated account with OAuth: {account.organization_uuid[:8]}..."
+                f"Successfully authenticated account with OAuth: {account.short_id}"
             )
             return True
 
@@ -411,7 +411,7 @@ class OAuthAuthenticator:
         account.save()
 
         logger.info(
-            f"Successfully refreshed OAuth token for account: {account.organization_uuid[:8]}..."
+            f"Successfully refreshed OAuth token for account: {account.short_id}"
         )
         return True
 
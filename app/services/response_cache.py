@@ -0,0 +1,151 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.models.claude import MessagesAPIRequest
+
+
+class ResponseCacheService:
+    """
+    Singleton exact-match cache of Claude.ai web SSE streams.
+    Identical requests within the TTL replay the previously captured stream
+    instead of issuing another round-trip to Claude.ai.
+    """
+
+    _instance: Optional["ResponseCacheService"] = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        """Implement singleton pattern."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the ResponseCacheService."""
+        # Maps request hash -> (created_at, captured SSE chunks)
+        self._entries: OrderedDict[str, Tuple[float, List[str]]] = OrderedDict()
+
+        logger.info(
+            f"ResponseCacheService initialized with enabled={settings.response_cache_enabled}, "
+            f"ttl={settings.response_cache_ttl}s, max_size={settings.response_cache_max_size}"
+        )
+
+    def build_key(self, request: MessagesAPIRequest) -> str:
+        """
+        Build a cache key from the parts of the request that affect the response.
+
+        Args:
+            request: The incoming Messages API request
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload = request.model_dump_json(
+            include={
+                "model",
+                "system",
+                "messages",
+                "max_tokens",
+                "thinking",
+                "stop_sequences",
+            }
+        )
+
+        hasher = hashlib.blake2b(digest_size=32)
+        hasher.update(payload.encode("utf-8"))
+        hasher.update(b"\x00")
+        hasher.update((settings.custom_prompt or "").encode("utf-8"))
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """
+        Get captured SSE chunks for a request key.
+
+        Args:
+            key: Cache key from build_key
+
+        Returns:
+            Captured chunks if cached and not expired, None otherwise
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        created_at, chunks = entry
+        if time.monotonic() - created_at > settings.response_cache_ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        logger.debug(f"Response cache hit: {key[:16]}...")
+        return chunks
+
+    def set(self, key: str, chunks: List[str]) -> None:
+        """
+        Store captured SSE chunks, evicting the least recently used entries.
+
+        Args:
+            key: Cache key from build_key
+            chunks: Complete list of SSE chunks of the response
+        """
+        self._entries[key] = (time.monotonic(), chunks)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > settings.response_cache_max_size:
+            self._entries.popitem(last=False)
+
+        logger.debug(
+            f"Response cache stored: {key[:16]}... "
+            f"Total cache size: {len(self._entries)}"
+        )
+
+    async def replay(self, chunks: List[str]) -> AsyncIterator[str]:
+        """Replay captured SSE chunks as a stream."""
+        for chunk in chunks:
+            yield chunk
+
+    async def capture(self, key: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """
+        Pass a live SSE stream through while capturing it.
+
+        The response is only stored when the upstream stream completes with a
+        message_stop event and carried no error event, so interrupted,
+        truncated or failed responses are never replayed.
+        """
+        chunks: List[str] = []
+        completed = False
+        errored = False
+        async for chunk in stream:
+            chunks.append(chunk)
+            if chunk.startswith("event:"):
+                event_type = chunk[6:].strip()
+                if event_type == "message_stop":
+                    completed = True
+                elif event_type == "error":
+                    errored = True
+            yield chunk
+
+        if completed and not errored:
+            self.set(key, chunks)
+        else:
+            logger.debug(f"Response cache skipped incomplete response: {key[:16]}...")
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        self._entries.clear()
+        logger.info("Cleared response cache")
+
+    def __repr__(self) -> str:
+        """String representation of the ResponseCacheService."""
+        return f"<ResponseCacheService entries={len(self._entries)}>"
+
+
+response_cache_service = ResponseCacheService()
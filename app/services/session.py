@@ -6,6 +6,7 @@ from loguru import logger
 
 from app.core.config import settings
 from app.core.claude_session import ClaudeWebSession
+from app.core.external.claude_client import ClaudeWebClient
 
 
 class SessionManager:
@@ -179,6 +180,8 @@ class SessionManager:
             for session_id in session_ids:
                 await self._remove_session(session_id)
 
+        await ClaudeWebClient.close_shared_sessions()
+
         logger.info("Cleaned up all sessions")
 
     def __repr__(self) -> str: